@@ -0,0 +1,60 @@
+import math
+import numpy as np
+
+# Checks whole batches of submitted boards at once with NumPy instead of one Cell or is_valid call at a time.
+#   solved, conflicts = validate_boards(boards)    boards is an (N, 9, 9) integer array, 0 for an empty cell
+# solved[k] is True when board k is full and breaks no rule, conflicts[k] marks the same cells
+# Board.conflicts would: every cell whose digit repeats in its row, column or box, plus digits outside 1-9.
+# Works for any perfect-square size up to 49x49.
+
+CHUNK_SIZE = 16384  # boards checked per pass, small enough for the working arrays to stay in cache
+
+def validate_boards(boards, chunk_size=CHUNK_SIZE):
+    boards = np.asarray(boards)
+    if boards.ndim != 3 or boards.shape[1] != boards.shape[2]:
+        raise ValueError(f"expected an (N, n, n) array of boards, got shape {boards.shape}")
+    row_length = boards.shape[1]
+    box_length = math.isqrt(row_length)
+    if box_length * box_length != row_length or row_length > 49:
+        raise ValueError(f"board size {row_length} is not a perfect square up to 49")
+    solved = np.empty(len(boards), dtype=bool)
+    conflicts = np.empty(boards.shape, dtype=bool)
+    for start in range(0, len(boards), chunk_size):
+        stop = start + chunk_size
+        solved[start:stop], conflicts[start:stop] = check_chunk(boards[start:stop], box_length)
+    return solved, conflicts
+
+def repeated_digits(units):
+    # units is (..., cells) of digit bits, returns the bits seen more than once in each unit
+    seen = np.zeros(units.shape[:-1], dtype=units.dtype)
+    repeated = np.zeros_like(seen)
+    for cell in range(units.shape[-1]):
+        bits = units[..., cell]
+        repeated |= seen & bits
+        seen |= bits
+    return repeated
+
+def check_chunk(boards, box_length):
+    count, row_length = boards.shape[:2]
+    filled = boards != 0
+    in_range = (boards >= 0) & (boards <= row_length)
+    # the same one-bit-per-digit masks the generator uses, an empty or out of range cell gets no bit
+    digit_bits = np.left_shift(1, np.arange(row_length + 1), dtype=np.int64).astype(np.uint64 if row_length > 31 else np.uint32)
+    digit_bits[0] = 0
+    bits = digit_bits[np.where(in_range, boards, 0)]
+    boxes = bits.reshape(count, box_length, box_length, box_length, box_length).swapaxes(2, 3)
+    box_repeats = repeated_digits(boxes.reshape(count, box_length, box_length, row_length))
+    repeated = repeated_digits(bits)[:, :, None] | repeated_digits(bits.swapaxes(1, 2))[:, None, :]
+    repeated |= np.repeat(np.repeat(box_repeats, box_length, axis=1), box_length, axis=2)
+    conflicts = (bits & repeated) != 0
+    conflicts |= filled & ~in_range
+    solved = filled.all(axis=(1, 2)) & ~conflicts.any(axis=(1, 2))
+    return solved, conflicts
+
+def board_verdicts(boards):
+    # one word per board, the same ones `python -m sudoku_cli validate` prints for full boards
+    boards = np.asarray(boards)
+    solved, conflicts = validate_boards(boards)
+    full = (boards != 0).all(axis=(1, 2))
+    return ["solved" if ok else "invalid" if bad or is_full else "incomplete"
+            for ok, bad, is_full in zip(solved.tolist(), conflicts.any(axis=(1, 2)).tolist(), full.tolist())]
@@ -0,0 +1,40 @@
+import os, sys, time
+
+# Throughput of the NumPy batch validator against the per-board checks it replaces.
+# Usage: python benchmarks/bench_batch.py [boards]   (default 200000, needs numpy)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from batch_validator import validate_boards
+from sudoku_generator import SudokuGenerator, generate_many
+
+def sample_boards(count, seed=12345):
+    # 64 solved grids repeated up to count, every fourth board gets a repeated digit
+    solutions = [solution for puzzle, solution in generate_many(0, 64, workers=1, seed=seed, solutions=True)]
+    boards = np.tile(np.array(solutions, dtype=np.int8), ((count + 63) // 64, 1, 1))[:count]
+    boards[::4, 0, 0] = boards[::4, 0, 1]
+    return boards
+
+def per_board(boards):
+    generator = SudokuGenerator(0)
+    for board in boards:
+        generator.board = board
+        generator.is_board_complete()
+
+def main(count):
+    boards = sample_boards(count)
+    validate_boards(boards[:1000])
+    start = time.perf_counter()
+    solved, conflicts = validate_boards(boards)
+    batch = time.perf_counter() - start
+    sample = boards[:2000].tolist()
+    start = time.perf_counter()
+    per_board(sample)
+    single = (time.perf_counter() - start) / len(sample) * count
+    print(f"{count} boards, {int(solved.sum())} solved")
+    print(f"validate_boards     {batch * 1000:10.1f} ms {count / batch:12.0f} boards/s")
+    print(f"is_board_complete   {single * 1000:10.1f} ms {count / single:12.0f} boards/s  (from {len(sample)} boards)")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
@@ -0,0 +1,57 @@
+import os, sys, time
+
+# Times the Dancing Links solver against the generator's backtracking counter on a set of hard puzzles.
+# Usage: python benchmarks/bench_solver.py [puzzle_file ...]
+# Puzzle files hold one 81 character puzzle per line ('.' or '0' for empty cells, '#' starts a comment).
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sudoku_solver
+from sudoku_generator import SudokuGenerator
+
+DEFAULT_PUZZLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "hard_puzzles.txt")
+
+def load_puzzles(path):
+    puzzles = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            values = [0 if ch in ".0" else int(ch) for ch in line[:81]]
+            puzzles.append([values[i * 9:i * 9 + 9] for i in range(9)])
+    return puzzles
+
+def backtracker_count(board):
+    # the generator's bitmask backtracker, loaded with the puzzle instead of a generated grid
+    generator = SudokuGenerator(0, len(board))
+    generator.board = [row[:] for row in board]
+    generator.rebuild_masks()
+    return generator.count_solutions(2)
+
+def time_it(func, puzzles, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for board in puzzles:
+            func(board)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main(paths):
+    repeat = 3
+    print(f"{'puzzle set':<24}{'count':>6}{'dlx solve':>14}{'dlx unique':>14}{'backtracker':>14}")
+    for path in paths:
+        puzzles = load_puzzles(path)
+        # every puzzle has to give the same answer from both searches before its time means anything
+        for board in puzzles:
+            if sudoku_solver.count_solutions(board) != backtracker_count(board):
+                raise SystemExit(f"solution counts disagree for a puzzle in {path}")
+        solve = time_it(sudoku_solver.solve, puzzles, repeat)
+        unique = time_it(sudoku_solver.count_solutions, puzzles, repeat)
+        backtrack = time_it(backtracker_count, puzzles, repeat)
+        per_puzzle = lambda seconds: f"{seconds / len(puzzles) * 1000:.2f} ms"
+        print(f"{os.path.basename(path):<24}{len(puzzles):>6}{per_puzzle(solve):>14}{per_puzzle(unique):>14}{per_puzzle(backtrack):>14}")
+
+if __name__ == "__main__":
+    main(sys.argv[1:] or [DEFAULT_PUZZLES])
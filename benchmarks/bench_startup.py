@@ -0,0 +1,35 @@
+import os, statistics, subprocess, sys, time
+
+# Measures cold start of the modules and entry points in a fresh interpreter for each run.
+# Usage: python benchmarks/bench_startup.py [runs]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CASES = [
+    ("python (baseline)", ["-c", "pass"]),
+    ("import sudoku_generator", ["-c", "import sudoku_generator"]),
+    ("import sudoku_board", ["-c", "import sudoku_board"]),
+    ("import sudoku (gui module)", ["-c", "import sudoku"]),
+    ("gui up: SudokuGame()", ["-c", "import sudoku; sudoku.SudokuGame()"]),
+    ("cli: generate 1 puzzle", ["-m", "sudoku_cli", "generate", "--count", "1"]),
+]
+
+def run(args):
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy", PYGAME_HIDE_SUPPORT_PROMPT="1")
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable] + args, cwd=ROOT, env=env, capture_output=True)
+    elapsed = time.perf_counter() - start
+    # a case that fails (e.g. a module missing in an older checkout) is reported instead of timed
+    return elapsed if result.returncode == 0 else None
+
+def main(runs):
+    print(f"{'case':<30}{'median':>12}{'min':>12}")
+    for name, args in CASES:
+        times = [run(args) for _ in range(runs)]
+        if None in times:
+            print(f"{name:<30}{'failed':>12}")
+            continue
+        print(f"{name:<30}{statistics.median(times) * 1000:>9.1f} ms{min(times) * 1000:>9.1f} ms")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
@@ -0,0 +1,289 @@
+import argparse, json, os, platform, random, statistics, sys, time
+
+# Micro and macro benchmarks for the generator, the board logic and rendering, with fixed seeds.
+# Runs headless: rendering uses SDL's dummy video driver. Benchmarks listed in BUDGETS also fail the run
+# when their p90 goes over the published time budget.
+#
+#   python benchmarks/bench_suite.py                           print latency percentiles and throughput
+#   python benchmarks/bench_suite.py --save baseline.json      also record the results as a baseline
+#   python benchmarks/bench_suite.py --compare baseline.json   flag benchmarks slower than the baseline by
+#                                                              more than --threshold (exit status 1 if any)
+# Back to back runs of the same code differ by 30% or more on a busy machine, so every benchmark is run --rounds
+# times and the round with the middle median is kept (for --save too), and a benchmark that still looks slower
+# than the baseline is run --confirm more times and only its best median is compared.
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from colors_and_values import difficulty_settings, WIDTH, GRID_HEIGHT
+from sudoku_board import Board, removed_for
+from sudoku_generator import SudokuGenerator
+from sudoku_grader import grade
+
+SEED = 12345
+
+def filled_generator(removed=0, seed=SEED):
+    random.seed(seed)
+    generator = SudokuGenerator(removed)
+    generator.fill_values()
+    return generator
+
+def puzzle(difficulty, seed=SEED):
+    generator = filled_generator(difficulty_settings[difficulty], seed)
+    generator.remove_cells(unique=True)
+    return generator.get_board()
+
+# Every benchmark is setup() -> state and op(state), op is timed `inner` times per sample.
+# setup runs again before each sample so ops that change their state (e.g. remove_cells) start fresh.
+
+def bench_fill_values():
+    def setup():
+        random.seed(SEED)
+        return SudokuGenerator(0)
+    return setup, lambda generator: generator.fill_values(), 1
+
+def bench_fill_grid(row_length):
+    def factory():
+        rng = random.Random(SEED)
+        return (lambda: SudokuGenerator(0, row_length, rng=rng),
+                lambda generator: generator.fill_values(), 1)
+    return factory
+
+def bench_remove_cells_large(row_length, difficulty):
+    def factory():
+        rng = random.Random(SEED)
+        def setup():
+            generator = SudokuGenerator(removed_for(difficulty, row_length), row_length, rng=rng)
+            generator.fill_values()
+            return generator
+        return setup, lambda generator: generator.remove_cells(unique=True), 1
+    return factory
+
+def bench_remove_cells():
+    return (lambda: filled_generator(difficulty_settings["hard"]),
+            lambda generator: generator.remove_cells(), 1)
+
+def bench_remove_cells_unique():
+    return (lambda: filled_generator(difficulty_settings["hard"]),
+            lambda generator: generator.remove_cells(unique=True), 1)
+
+def bench_is_valid():
+    generator = filled_generator(40)
+    generator.remove_cells()
+    cells = [(row, col, num) for row in range(9) for col in range(9) for num in range(1, 10)]
+    def op(generator):
+        for row, col, num in cells:
+            generator.is_valid(row, col, num)
+    return (lambda: generator), op, 1
+
+def bench_is_board_complete():
+    generator = filled_generator()
+    return (lambda: generator), lambda generator: generator.is_board_complete(), 100
+
+def bench_grade():
+    puzzles = [puzzle(difficulty, SEED + offset) for difficulty in difficulty_settings for offset in range(10)]
+    def op(puzzles):
+        for board in puzzles:
+            grade(board)
+    return (lambda: puzzles), op, 1
+
+def bench_check_is_correct():
+    board = Board(WIDTH, GRID_HEIGHT, None, "hard", puzzle=puzzle("hard"))
+    return (lambda: board), lambda board: board.check_is_correct(), 1000
+
+def bench_board_hint():
+    board = Board(WIDTH, GRID_HEIGHT, None, "hard", puzzle=puzzle("hard"))
+    return (lambda: board), lambda board: board.hint(), 1000
+
+def bench_board_keypress():
+    board = Board(WIDTH, GRID_HEIGHT, None, "hard", puzzle=puzzle("hard"))
+    n = board.row_length
+    row, col = divmod(board.model.values.index(0), n)
+    board.select(row, col)
+    def op(board):
+        # enter every digit in one empty cell, each one updates counts, conflicts and the candidate grid
+        for value in range(1, n + 1):
+            board.sketch(value)
+            board.submit_guess()
+    return (lambda: board), op, 10
+
+def bench_board_undo_redo():
+    board = Board(WIDTH, GRID_HEIGHT, None, "hard", puzzle=puzzle("hard"))
+    n = board.row_length
+    row, col = divmod(board.model.values.index(0), n)
+    board.select(row, col)
+    board.sketch(1)
+    board.submit_guess()
+    return (lambda: board), lambda board: (board.undo(), board.redo()), 1000
+
+def bench_board_setup():
+    grid = puzzle("hard")
+    return (lambda: grid), lambda grid: Board(WIDTH, GRID_HEIGHT, None, "hard", puzzle=grid), 10
+
+def bench_board_draw():
+    import sudoku
+    screen = sudoku.init_display()
+    board = Board(WIDTH, GRID_HEIGHT, screen, "hard", puzzle=puzzle("hard"))
+    board.select(4, 4)
+    board.draw()  # builds the cached background once, as the game does
+    return (lambda: board), lambda board: board.draw(), 10
+
+def bench_board_draw_dirty():
+    import pygame, sudoku
+    screen = sudoku.init_display()
+    board = Board(WIDTH, GRID_HEIGHT, screen, "hard", puzzle=puzzle("hard"))
+    board.draw()
+    moves = [(row, col) for row in range(9) for col in range(9)]
+    def op(board):
+        for row, col in moves:
+            board.select(row, col)
+            pygame.display.update(board.draw_dirty())
+    return (lambda: board), op, 1
+
+def bench_game_replay():
+    import input_replay
+    puzzles = input_replay.ReplayPuzzles(SEED)
+    batches = list(input_replay.scripted_session(10, 100, SEED))
+    # a whole scripted session through SudokuGame: start screen, 10 games of 100 inputs, restarts
+    return (lambda: batches), lambda batches: input_replay.replay(batches, puzzles), 1
+
+BENCHMARKS = {
+    "generator.fill_values": bench_fill_values,
+    "generator.fill_grid_16x16": bench_fill_grid(16),
+    "generator.fill_grid_25x25": bench_fill_grid(25),
+    "generator.remove_cells": bench_remove_cells,
+    "generator.remove_cells_unique": bench_remove_cells_unique,
+    "generator.remove_cells_16x16_hard": bench_remove_cells_large(16, "hard"),
+    "generator.is_valid_x729": bench_is_valid,
+    "generator.is_board_complete": bench_is_board_complete,
+    "grader.grade_x30": bench_grade,
+    "board.check_is_correct": bench_check_is_correct,
+    "board.hint": bench_board_hint,
+    "board.keypress_x9": bench_board_keypress,
+    "board.undo_redo": bench_board_undo_redo,
+    "board.setup_from_grid": bench_board_setup,
+    "board.draw_frame": bench_board_draw,
+    "board.draw_dirty_x81_moves": bench_board_draw_dirty,
+    "game.replay_10x100_inputs": bench_game_replay,
+}
+
+# published time budgets in microseconds, a benchmark whose p90 goes over its budget is flagged on every run
+BUDGETS = {
+    "generator.fill_grid_16x16": 100_000,
+    "generator.fill_grid_25x25": 2_000_000,
+    "generator.remove_cells_16x16_hard": 2_000_000,
+}
+
+# benchmarks that take a large fraction of a second run at most this many samples per round
+MAX_SAMPLES = {
+    "generator.remove_cells_16x16_hard": 10,
+}
+
+def run_benchmark(factory, samples, warmup=3):
+    setup, op, inner = factory()
+    for _ in range(warmup):
+        op(setup())  # fills caches and lets the interpreter settle before anything is recorded
+    times = []
+    for _ in range(samples):
+        state = setup()
+        start = time.perf_counter()
+        for _ in range(inner):
+            op(state)
+        times.append((time.perf_counter() - start) / inner)
+    times.sort()
+    def percentile(p):
+        return times[min(len(times) - 1, int(p / 100 * len(times)))]
+    return {
+        "samples": samples,
+        "min_us": times[0] * 1e6,
+        "p50_us": statistics.median(times) * 1e6,
+        "p90_us": percentile(90) * 1e6,
+        "p99_us": percentile(99) * 1e6,
+        "max_us": times[-1] * 1e6,
+        "ops_per_s": 1 / statistics.median(times),
+    }
+
+# sub-microsecond ops swing by tens of percent on timer noise alone, so a regression also has to cost this much
+MIN_SLOWDOWN_US = 1.0
+
+def slowdown(result, baseline, name):
+    # the median's change against the baseline as a fraction, None if the baseline doesn't have the benchmark
+    # changes smaller than MIN_SLOWDOWN_US count as none
+    old = baseline.get("results", {}).get(name)
+    if old is None:
+        return None
+    if result["p50_us"] - old["p50_us"] < MIN_SLOWDOWN_US:
+        return min(0.0, result["p50_us"] / old["p50_us"] - 1)
+    return result["p50_us"] / old["p50_us"] - 1
+
+def confirm(results, baseline, threshold, samples, runs):
+    # reruns every benchmark over the threshold and keeps its fastest median, so one noisy run is not a regression
+    for name, result in results.items():
+        for _ in range(runs):
+            change = slowdown(results[name], baseline, name)
+            if change is None or change <= threshold:
+                break
+            rerun = run_benchmark(BENCHMARKS[name], min(samples, MAX_SAMPLES.get(name, samples)))
+            if rerun["p50_us"] < results[name]["p50_us"]:
+                results[name] = rerun
+
+def run_rounds(factory, samples, rounds):
+    # one slow or lucky round doesn't move the result, the round with the middle median is reported
+    results = sorted((run_benchmark(factory, samples) for _ in range(max(1, rounds))), key=lambda result: result["p50_us"])
+    return results[len(results) // 2]
+
+def compare(results, baseline, threshold):
+    # a benchmark regresses when its median is more than threshold (a fraction) above the baseline's
+    regressions = []
+    for name, result in results.items():
+        change = slowdown(result, baseline, name)
+        if change is None:
+            continue
+        old = baseline["results"][name]
+        flag = "REGRESSION" if change > threshold else ""
+        print(f"{name:<32}{old['p50_us']:>12.1f}{result['p50_us']:>12.1f}{change * 100:>+9.1f}%  {flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the generator, board logic and rendering.")
+    parser.add_argument("--samples", type=int, default=50)
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--save", metavar="PATH", help="write the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a JSON baseline")
+    parser.add_argument("--threshold", type=float, default=0.3, help="allowed slowdown before flagging, 0.3 = 30%%")
+    parser.add_argument("--rounds", type=int, default=3, help="runs of every benchmark, the middle one is reported")
+    parser.add_argument("--confirm", type=int, default=3, help="reruns of a benchmark over the threshold before flagging it")
+    args = parser.parse_args(argv)
+
+    results = {}
+    over_budget = []
+    print(f"{'benchmark':<32}{'p50 us':>12}{'p90 us':>12}{'p99 us':>12}{'max us':>12}{'ops/s':>12}")
+    for name, factory in BENCHMARKS.items():
+        if args.filter not in name:
+            continue
+        result = run_rounds(factory, min(args.samples, MAX_SAMPLES.get(name, args.samples)), args.rounds)
+        results[name] = result
+        print(f"{name:<32}{result['p50_us']:>12.1f}{result['p90_us']:>12.1f}{result['p99_us']:>12.1f}"
+              f"{result['max_us']:>12.1f}{result['ops_per_s']:>12.0f}")
+        if name in BUDGETS and result["p90_us"] > BUDGETS[name]:
+            print(f"{'':<32}OVER BUDGET: p90 above {BUDGETS[name] / 1000:.0f} ms")
+            over_budget.append(name)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(),
+                       "seed": SEED, "results": results}, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        confirm(results, baseline, args.threshold, args.samples, args.confirm)
+        print(f"\n{'benchmark':<32}{'base p50':>12}{'now p50':>12}{'change':>10}")
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 1 if over_budget else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
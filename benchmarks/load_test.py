@@ -0,0 +1,131 @@
+import argparse, asyncio, json, os, statistics, subprocess, sys, time
+
+# Load test for puzzle_service.py: keeps --concurrency requests in flight on each of --connections connections
+# and reports throughput and latency percentiles.
+#   python benchmarks/load_test.py --spawn --op generate --difficulty easy --requests 2000
+#   python benchmarks/load_test.py --port 8765 --op solve --concurrency 32     against a running service
+# --spawn starts a service on a free port for the run and stops it afterwards.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+HARD_PUZZLES = os.path.join(ROOT, "benchmarks", "hard_puzzles.txt")
+
+def requests_for(args):
+    # an endless supply of request bodies for the chosen op
+    if args.op == "generate":
+        while True:
+            yield {"op": "generate", "difficulty": args.difficulty}
+    with open(HARD_PUZZLES) as f:
+        boards = [line.strip()[:81] for line in f if line.strip() and not line.startswith("#")]
+    while True:
+        for board in boards:
+            yield {"op": args.op, "board": board}
+
+async def run_connection(args, connect, bodies, count, latencies, errors):
+    reader, writer = await connect()
+    sent = {}  # request id -> send time
+    slots = asyncio.Semaphore(args.concurrency)
+
+    async def read_responses():
+        for received in range(count):
+            try:
+                line = await reader.readline()
+            except ConnectionError:
+                line = b""
+            if not line:
+                # the service closed the connection, every request it didn't answer counts as an error
+                errors.extend(["connection closed by the service"] * (count - received))
+                for _ in range(args.concurrency):
+                    slots.release()  # lets the sending loop see it and stop
+                return
+            response = json.loads(line)
+            started = sent.pop(response.get("id"), None)  # None for a reply the service couldn't tie to a request
+            if started is not None:
+                latencies.append(time.perf_counter() - started)
+            if not response.get("ok") or started is None:
+                errors.append(response.get("error", "reply without a request id"))
+            slots.release()
+
+    reading = asyncio.create_task(read_responses())
+    try:
+        for request_id in range(count):
+            await slots.acquire()
+            if reading.done():
+                break
+            sent[request_id] = time.perf_counter()
+            writer.write(json.dumps(dict(next(bodies), id=request_id)).encode("utf-8") + b"\n")
+            await writer.drain()
+    except ConnectionError:
+        pass  # read_responses sees the end of the connection too and counts what is missing
+    await reading
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except ConnectionError:
+        pass
+
+async def load_test(args, connect):
+    bodies = requests_for(args)
+    latencies = []
+    errors = []
+    per_connection = [args.requests // args.connections + (index < args.requests % args.connections)
+                      for index in range(args.connections)]
+    start = time.perf_counter()
+    await asyncio.gather(*(run_connection(args, connect, bodies, count, latencies, errors) for count in per_connection))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000
+    print(f"{args.op} x{len(latencies)} over {args.connections} connection(s), {args.concurrency} in flight each")
+    print(f"throughput {len(latencies) / elapsed:.0f} requests/s, {len(errors)} errors")
+    if latencies:
+        print(f"latency ms  p50 {statistics.median(latencies) * 1000:.2f}  p90 {percentile(90):.2f}  "
+              f"p99 {percentile(99):.2f}  max {latencies[-1] * 1000:.2f}")
+    else:
+        print("no replies, no latencies to report")
+    if errors:
+        print(f"first error: {errors[0]}")
+    return 1 if errors else 0
+
+def spawn_service(args):
+    command = [sys.executable, os.path.join(ROOT, "puzzle_service.py"), "--port", "0"]
+    if args.workers:
+        command += ["--workers", str(args.workers)]
+    service = subprocess.Popen(command, stdout=subprocess.PIPE, text=True, cwd=ROOT)
+    line = service.stdout.readline()  # "listening on host:port"
+    host, port = line.rsplit(" ", 1)[1].strip().rsplit(":", 1)
+    return service, host, int(port)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the puzzle service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", metavar="PATH", default=None)
+    parser.add_argument("--spawn", action="store_true", help="start a service for this run")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes of a spawned service")
+    parser.add_argument("--op", choices=["generate", "solve", "validate"], default="generate")
+    parser.add_argument("--difficulty", default="easy")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--connections", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=8, help="requests in flight per connection")
+    parser.add_argument("--warmup", type=float, default=1.0, help="seconds to let a spawned service fill its cache")
+    args = parser.parse_args(argv)
+
+    service = None
+    if args.spawn:
+        service, args.host, args.port = spawn_service(args)
+        time.sleep(args.warmup)
+    if args.unix:
+        connect = lambda: asyncio.open_unix_connection(args.unix)
+    else:
+        connect = lambda: asyncio.open_connection(args.host, args.port)
+    try:
+        return asyncio.run(load_test(args, connect))
+    finally:
+        if service is not None:
+            service.terminate()
+            service.wait()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,33 @@
+# Compact storage for one puzzle, shared by SudokuGenerator and the Board/Cell views in sudoku.py.
+# Cells are stored row by row in flat bytearrays (index = row * row_length + col), one byte per cell and plane.
+
+#maps every non-zero byte to 1, so bytes.translate turns a values plane into a fixed plane in C
+NONZERO_TO_ONE = bytes([0] + [1] * 255)
+
+class BoardModel:
+    __slots__ = ("row_length", "values", "fixed", "sketches")
+
+    def __init__(self, row_length=9):
+        self.row_length = row_length
+        self.values = bytearray(row_length * row_length)  # 0 for an empty cell
+        self.fixed = bytearray(row_length * row_length)  # 1 for a given clue that can't be changed
+        self.sketches = bytearray(row_length * row_length)  # pencilled value, 0 for none
+
+    def load(self, board):
+        # copies a list of lists in, its non-zero cells become the fixed clues
+        self.values[:] = bytes(num for row in board for num in row)
+        self.fix_givens()
+
+    def fix_givens(self):
+        self.fixed[:] = self.values.translate(NONZERO_TO_ONE)
+
+    def snapshot(self):
+        return bytes(self.values)
+
+    def restore(self, snapshot):
+        # bulk copy of a snapshot() back into the values plane
+        self.values[:] = snapshot
+
+    def to_lists(self):
+        n = self.row_length
+        return [list(self.values[i * n:(i + 1) * n]) for i in range(n)]
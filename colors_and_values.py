@@ -14,4 +14,25 @@ LINE_COLOR=(255,255,255)# lines for sudoku, color can be changed
 CELL_SIZE=60
 
 PINK = (255, 192, 203)
-GREEN = (0, 255, 0)
\ No newline at end of file
+GREEN = (0, 255, 0)
+CONFLICT_COLOR = (220, 20, 60) # outline for cells whose value repeats in a row, column or box
+
+difficulty_settings = {
+    "easy": 30,
+    "medium": 40,
+    "hard": 50
+}
+
+# logic score bands (sudoku_grader.grade) that generated 9x9 puzzles have to land in,
+# the counts above are then only where cell removal starts grading
+difficulty_scores = {
+    "easy": (0, 45),
+    "medium": (46, 150),
+    "hard": (151, 100000)
+}
+
+PUZZLE_BANK_PATH = "puzzles.bank" # pre-generated puzzles, built with python puzzle_bank.py
+MAX_FPS = 60 # upper bound on redraws per second while playing
+PREFETCH_DEPTH = 3 # puzzles kept ready per difficulty by the background prefetcher, 0 turns it off
+SAVE_PATH = "sudoku.save" # the game in progress, written at checkpoints and on exit
+CHECKPOINT_EDITS = 20 # edits between two checkpoints of the game in progress
\ No newline at end of file
@@ -0,0 +1,92 @@
+import math, os, struct
+from colors_and_values import SAVE_PATH, difficulty_settings
+from sudoku_board import Board
+
+# Binary save file for a game in progress, written at checkpoints and read back to resume without replaying anything.
+#
+# Layout (little endian):
+#   header  magic b"SDKG", version, row_length, difficulty name, move count, undo position   struct HEADER
+#   puzzle  the initial values, one byte per cell (non-zero cells are the givens)
+#   state   the current values, then the current sketches, one byte per cell each
+#   moves   the move log, one MOVE record per edit: cell index, old value, new value, old sketch, new sketch
+
+MAGIC = b"SDKG"
+VERSION = 1
+HEADER = struct.Struct("<4sHH16sII")
+MOVE = struct.Struct("<HBBBB")
+
+def save_game(board, path=SAVE_PATH):
+    # writes to a temporary file first so a crash mid-write never leaves a broken save behind
+    data = bytearray(HEADER.pack(MAGIC, VERSION, board.row_length, board.difficulty.encode("utf-8"),
+                                 len(board.moves), board.position))
+    data += board.initial_values
+    data += board.model.values
+    data += board.model.sketches
+    for move in board.moves:
+        data += MOVE.pack(*move)
+    with open(path + ".tmp", "wb") as f:
+        f.write(data)
+    os.replace(path + ".tmp", path)
+
+def consistent(moves, position, initial, values, sketches):
+    # the move log has to fit the saved state: undoing moves[:position] from it must meet every move's new value
+    # and sketch and end on the puzzle, redoing moves[position:] must meet every move's old value and sketch
+    # (a reset restores the values but leaves the sketches, so only the values are compared with the puzzle)
+    current_values = bytearray(values)
+    current_sketches = bytearray(sketches)
+    for index, old_value, new_value, old_sketch, new_sketch in reversed(moves[:position]):
+        if current_values[index] != new_value or current_sketches[index] != new_sketch:
+            return False
+        current_values[index] = old_value
+        current_sketches[index] = old_sketch
+    if current_values != initial:
+        return False
+    current_values[:] = values
+    current_sketches[:] = sketches
+    for index, old_value, new_value, old_sketch, new_sketch in moves[position:]:
+        if current_values[index] != old_value or current_sketches[index] != old_sketch:
+            return False
+        current_values[index] = new_value
+        current_sketches[index] = new_sketch
+    return True
+
+def load_game(width, height, screen, path=SAVE_PATH):
+    # returns the saved Board, or None when there is no save or it can't be read
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version, n, difficulty, move_count, position = HEADER.unpack_from(data, 0)
+    except (OSError, struct.error):
+        return None
+    cells = n * n
+    if magic != MAGIC or version != VERSION or len(data) != HEADER.size + 3 * cells + move_count * MOVE.size:
+        return None
+    difficulty = difficulty.rstrip(b"\0").decode("utf-8", "replace")
+    if difficulty not in difficulty_settings or n == 0 or math.isqrt(n) ** 2 != n or position > move_count:
+        return None
+    offset = HEADER.size
+    initial = data[offset:offset + cells]
+    values = data[offset + cells:offset + 2 * cells]
+    sketches = data[offset + 2 * cells:offset + 3 * cells]
+    start = offset + 3 * cells
+    moves = [MOVE.unpack_from(data, start + i * MOVE.size) for i in range(move_count)]
+    # a damaged save must not crash the game later: every digit is 0..n, the givens are still in place,
+    # every move edits a real, non-given cell, and undo/redo lead from the puzzle through the saved state
+    if max(data[offset:start]) > n or any(given and value != given for given, value in zip(initial, values)):
+        return None
+    if any(move[0] >= cells or initial[move[0]] or max(move[1:]) > n for move in moves):
+        return None  # a move past the board, on a given or with an impossible digit
+    if not consistent(moves, position, initial, values, sketches):
+        return None
+    board = Board(width, height, screen, difficulty, puzzle=[list(initial[i * n:(i + 1) * n]) for i in range(n)])
+    # the saved state is the checkpoint, so resuming is a bulk copy instead of a replay of the moves
+    board.model.restore(values)
+    board.model.sketches[:] = sketches
+    board.puzzle_loaded()
+    board.moves = moves
+    board.position = position
+    return board
+
+def delete_save(path=SAVE_PATH):
+    if os.path.exists(path):
+        os.remove(path)
@@ -0,0 +1,271 @@
+import argparse, json, os, random, statistics, sys, tempfile, time
+import sudoku
+from colors_and_values import WIDTH, HEIGHT, GRID_HEIGHT, difficulty_settings, difficulty_scores
+from sudoku import SudokuGame
+from sudoku_generator import generate_many
+
+# Headless input replay for the game loop: SudokuGame is driven by a script of event batches instead of live
+# pygame events, as fast as it can handle them, and every batch's latency and the frames drawn are recorded.
+#
+#   python input_replay.py generate --games 100 --seed 1 [--save session.jsonl]   replay a seeded random session
+#   python input_replay.py replay session.jsonl [--repeat 5]                       replay a saved or recorded one
+#   python input_replay.py record session.jsonl [--seed 1]                         play in a window and record it
+# --json prints the results as one JSON object, --max-p99-ms fails the run (exit status 1) over that latency.
+#
+# A script is JSON lines: a header {"version": 1, "seed": S, "pool": K}, then one line per batch of events that the
+# game takes in one go, each event ["click", x, y, button], ["key", name, mod] or ["quit"]. The puzzles come from a
+# pool of K graded puzzles per difficulty generated from the seed, and the save file is a temporary one,
+# so the same script always plays out the same way. A script that runs out ends with a quit.
+#
+# Latency is from handing a batch to the game until it waits for the next one, which covers handling the
+# events, the checkpoint and the frame they triggered. The blocking start, win and lose screens are driven the same way.
+
+VERSION = 1
+
+# click targets, the same layout as SudokuGame.start_screen, in_game_buttons and run_game
+START_BUTTONS = {difficulty: ((WIDTH - 530) // 2 + 75 + index * 190, HEIGHT // 2 + 85)
+                 for index, difficulty in enumerate(("easy", "medium", "hard"))}
+RESET_BUTTON = ((WIDTH - 490) // 2 + 75, GRID_HEIGHT + 35)
+RESTART_BUTTON = ((WIDTH - 490) // 2 + 245, GRID_HEIGHT + 35)
+
+def cell_center(row, col, row_length=9):
+    return col * (WIDTH // row_length) + WIDTH // row_length // 2, row * ((HEIGHT - 100) // row_length) + (HEIGHT - 100) // row_length // 2
+
+class ReplayPuzzles:
+    # the puzzle source for SudokuGame: a fixed pool per difficulty for a seed, handed out in turn
+
+    def __init__(self, seed=0, size=4):
+        self.pools = {difficulty: list(generate_many(removed, size, workers=1, seed=f"{seed}:{difficulty}", unique=True,
+                                                     band=difficulty_scores[difficulty]))
+                      for difficulty, removed in difficulty_settings.items()}
+        self.served = dict.fromkeys(self.pools, 0)
+
+    def rewind(self):
+        self.served = dict.fromkeys(self.pools, 0)
+
+    def get(self, difficulty):
+        pool = self.pools[difficulty]
+        puzzle = pool[self.served[difficulty] % len(pool)]
+        self.served[difficulty] += 1
+        return [row[:] for row in puzzle]
+
+def encode(event):
+    # None for the events the game ignores, they are left out of recordings
+    pygame = sudoku.pygame
+    if event.type == pygame.QUIT:
+        return ["quit"]
+    if event.type == pygame.MOUSEBUTTONDOWN:
+        return ["click", event.pos[0], event.pos[1], event.button]
+    if event.type == pygame.KEYDOWN:
+        return ["key", pygame.key.name(event.key), event.mod]
+    return None
+
+def decode(item):
+    pygame = sudoku.pygame
+    if item[0] == "quit":
+        return pygame.event.Event(pygame.QUIT)
+    if item[0] == "click":
+        return pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=(item[1], item[2]), button=item[3] if len(item) > 3 else 1)
+    if item[0] == "key":
+        return pygame.event.Event(pygame.KEYDOWN, key=pygame.key.key_code(item[1]), mod=item[2] if len(item) > 2 else 0)
+    raise ValueError(f"unknown event {item!r}")
+
+def scripted_session(games=10, moves=100, seed=0):
+    # yields the batches of a random but seeded session: pick a difficulty, play `moves` batches of clicks and keys,
+    # restart, and quit after the last game
+    rng = random.Random(seed)
+    ctrl = 0x40  # KMOD_LCTRL, scripts are written without pygame loaded
+    actions = ["cell", "arrow", "digit", "enter", "hint", "marks", "undo", "redo", "burst", "reset"]
+    weights = [25, 15, 20, 15, 8, 2, 6, 4, 4, 1]
+    for _ in range(games):
+        yield [["click", *START_BUTTONS[rng.choice(list(START_BUTTONS))], 1]]
+        for action in rng.choices(actions, weights, k=moves):
+            if action == "cell":
+                yield [["click", *cell_center(rng.randrange(9), rng.randrange(9)), 1]]
+            elif action == "arrow":
+                yield [["key", rng.choice(("up", "down", "left", "right")), 0]]
+            elif action == "digit":
+                yield [["key", str(rng.randint(1, 9)), 0]]
+            elif action == "enter":
+                yield [["key", "return", 0]]
+            elif action == "hint":
+                yield [["key", "h", 0]]
+            elif action == "marks":
+                yield [["key", "p", 0]]
+            elif action == "undo":
+                yield [["key", "z", ctrl]]
+            elif action == "redo":
+                yield [["key", "y", ctrl]]
+            elif action == "burst":
+                # several events in one batch, as when the game falls behind the input
+                yield [["key", rng.choice(("up", "down", "left", "right")), 0], ["key", str(rng.randint(1, 9)), 0],
+                       ["key", "return", 0]]
+            else:
+                yield [["click", *RESET_BUTTON, 1]]
+        yield [["click", *RESTART_BUTTON, 1]]
+    yield [["quit"]]
+
+def write_script(path, batches, seed=0, pool=4):
+    with open(path, "w") as f:
+        f.write(json.dumps({"version": VERSION, "seed": seed, "pool": pool}) + "\n")
+        for batch in batches:
+            f.write(json.dumps(batch) + "\n")
+
+def read_script(path):
+    # returns (header, batches), batches() reads the file lazily each time so long sessions don't have to fit in memory
+    with open(path) as f:
+        header = json.loads(f.readline())
+    if header.get("version") != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} replay script")
+    def batches():
+        with open(path) as f:
+            f.readline()
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    return header, batches
+
+class ReplayGame(SudokuGame):
+    max_fps = 0  # no frame cap, the replay runs as fast as the game can go
+
+    def __init__(self, batches, puzzles, save_path):
+        super().__init__(puzzles)
+        self.save_path = save_path
+        self.batches = iter(batches)
+        self.received = None  # when the batch being handled was handed over
+        self.latencies = []
+        self.frames = 0
+        self.events = 0
+        self.games = 0
+
+    def wait_for_events(self):
+        self.finish_batch()
+        batch = next(self.batches, None)
+        events = [decode(item) for item in batch] if batch is not None else [decode(["quit"])]
+        self.events += len(events)
+        self.received = time.perf_counter()
+        return events
+
+    def finish_batch(self):
+        if self.received is not None:
+            self.latencies.append(time.perf_counter() - self.received)
+            self.received = None
+
+    def run_game(self, difficulty, board=None):
+        self.games += 1
+        return super().run_game(difficulty, board)
+
+    def redraw(self):
+        self.frames += 1
+        super().redraw()
+
+    def start_screen(self):
+        self.frames += 1
+        return super().start_screen()
+
+    def game_win_screen(self):
+        self.frames += 1
+        super().game_win_screen()
+
+    def game_lose_screen(self):
+        self.frames += 1
+        super().game_lose_screen()
+
+def replay(batches, puzzles):
+    # plays the batches through a fresh game, returns the counts and latency percentiles in microseconds
+    puzzles.rewind()
+    with tempfile.TemporaryDirectory() as folder:
+        game = ReplayGame(batches, puzzles, os.path.join(folder, "replay.save"))
+        start = time.perf_counter()
+        game.run()
+        game.finish_batch()
+        seconds = time.perf_counter() - start
+    latencies = sorted(game.latencies)
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1e6
+    return {
+        "games": game.games,
+        "batches": len(latencies),
+        "events": game.events,
+        "frames": game.frames,
+        "seconds": seconds,
+        "events_per_s": game.events / seconds,
+        "frames_per_s": game.frames / seconds,
+        "p50_us": statistics.median(latencies) * 1e6,
+        "p90_us": percentile(90),
+        "p99_us": percentile(99),
+        "max_us": latencies[-1] * 1e6,
+    }
+
+class RecordingGame(SudokuGame):
+    # a normal windowed game that also writes every batch of events it handles to the script
+
+    def __init__(self, puzzles, save_path, script):
+        super().__init__(puzzles)
+        self.save_path = save_path
+        self.script = script
+
+    def wait_for_events(self):
+        events = super().wait_for_events()
+        batch = [item for item in map(encode, events) if item is not None]
+        if batch:
+            self.script.write(json.dumps(batch) + "\n")
+            self.script.flush()
+        return events
+
+def record(path, seed=0, pool=4):
+    puzzles = ReplayPuzzles(seed, pool)
+    with open(path, "w") as script, tempfile.TemporaryDirectory() as folder:
+        script.write(json.dumps({"version": VERSION, "seed": seed, "pool": pool}) + "\n")
+        RecordingGame(puzzles, os.path.join(folder, "replay.save"), script).run()
+
+def print_result(result, as_json):
+    if as_json:
+        print(json.dumps(result))
+        return
+    print(f"{result['games']} games, {result['batches']} batches, {result['events']} events, {result['frames']} frames "
+          f"in {result['seconds']:.2f} s ({result['events_per_s']:.0f} events/s, {result['frames_per_s']:.0f} frames/s)")
+    print(f"latency us: p50 {result['p50_us']:.0f}  p90 {result['p90_us']:.0f}  p99 {result['p99_us']:.0f}  max {result['max_us']:.0f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay scripted input through the game headless and measure it.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    generate_parser = commands.add_parser("generate", help="replay a seeded random session")
+    generate_parser.add_argument("--games", type=int, default=10)
+    generate_parser.add_argument("--moves", type=int, default=100, help="batches of input per game")
+    generate_parser.add_argument("--save", metavar="PATH", help="also write the session as a script")
+    replay_parser = commands.add_parser("replay", help="replay a script")
+    replay_parser.add_argument("path")
+    replay_parser.add_argument("--repeat", type=int, default=1)
+    record_parser = commands.add_parser("record", help="play in a window and record the input as a script")
+    record_parser.add_argument("path")
+    for command in (generate_parser, record_parser):
+        command.add_argument("--seed", type=int, default=0)
+        command.add_argument("--pool", type=int, default=4, help="puzzles per difficulty")
+    for command in (generate_parser, replay_parser):
+        command.add_argument("--json", action="store_true", help="print the results as JSON")
+        command.add_argument("--max-p99-ms", type=float, default=None, help="exit status 1 if the p99 latency is higher")
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        record(args.path, args.seed, args.pool)
+        return 0
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    if args.command == "generate":
+        if args.save:
+            write_script(args.save, scripted_session(args.games, args.moves, args.seed), args.seed, args.pool)
+        results = [replay(scripted_session(args.games, args.moves, args.seed), ReplayPuzzles(args.seed, args.pool))]
+    else:
+        header, batches = read_script(args.path)
+        puzzles = ReplayPuzzles(header.get("seed", 0), header.get("pool", 4))
+        results = [replay(batches(), puzzles) for _ in range(args.repeat)]
+    for result in results:
+        print_result(result, args.json)
+    if args.max_p99_ms is not None and any(result["p99_us"] > args.max_p99_ms * 1000 for result in results):
+        print(f"p99 latency over {args.max_p99_ms} ms", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
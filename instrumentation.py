@@ -0,0 +1,148 @@
+import atexit, json, os, sys, time
+from contextlib import contextmanager
+
+# Opt-in counters and timers for the generator, the board and the game loop.
+# Nothing is measured until enable() runs: it wraps the hot methods in place, so when it is off they are the
+# plain methods with no extra cost. The few counts that only exist inside a method check `enabled` once per call.
+#
+#   SUDOKU_STATS=1 python sudoku.py               print a stats table on exit
+#   SUDOKU_STATS=stats.jsonl python sudoku.py     append the stats as JSON lines on exit
+#   SUDOKU_PROFILE=session.prof python sudoku.py  also cProfile the whole session (read it with python -m pstats)
+#
+# or from code: instrumentation.enable(), ..., instrumentation.dump() / write_jsonl(path) / stats()
+
+enabled = False
+counters = {}  # name -> count
+timings = {}  # name -> [calls, total seconds, slowest call in seconds]
+profiler = None
+installed = []  # (owner, attribute, original) for every wrapped method, so disable() can put them back
+
+def count(name, amount=1):
+    counters[name] = counters.get(name, 0) + amount
+
+def add_time(name, seconds):
+    timing = timings.get(name)
+    if timing is None:
+        timings[name] = [1, seconds, seconds]
+    else:
+        timing[0] += 1
+        timing[1] += seconds
+        if seconds > timing[2]:
+            timing[2] = seconds
+
+@contextmanager
+def timer(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_time(name, time.perf_counter() - start)
+
+def wrap(owner, attribute, name, timed=True, false_counter=None):
+    # replaces owner.attribute with a version that counts (and times) every call
+    # false_counter also counts the calls that returned False, e.g. dead ends of a backtracking search
+    original = getattr(owner, attribute)
+    perf_counter = time.perf_counter
+    if timed:
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            result = original(*args, **kwargs)
+            add_time(name, perf_counter() - start)
+            if result is False and false_counter:
+                count(false_counter)
+            return result
+    else:
+        def wrapper(*args, **kwargs):
+            count(name)
+            result = original(*args, **kwargs)
+            if result is False and false_counter:
+                count(false_counter)
+            return result
+    wrapper.__wrapped__ = original
+    setattr(owner, attribute, wrapper)
+    installed.append((owner, attribute, original))
+
+def install():
+    from sudoku_board import Board
+    from sudoku_generator import SudokuGenerator
+    wrap(SudokuGenerator, "fill_values", "generator.fill_values")
+    wrap(SudokuGenerator, "fill_remaining", "generator.fill_remaining", timed=False, false_counter="generator.fill_remaining.backtracks")
+    # filling looks up candidate masks rather than calling is_valid, so these are the validity checks and placements
+    wrap(SudokuGenerator, "candidate_mask", "generator.candidate_mask", timed=False)
+    wrap(SudokuGenerator, "place", "generator.place", timed=False)
+    wrap(SudokuGenerator, "remove_cells", "generator.remove_cells")
+    # a removal put back because the puzzle would no longer have one solution
+    wrap(SudokuGenerator, "remove_if_unique", "generator.remove_if_unique", timed=False, false_counter="generator.remove_if_unique.rejected")
+    wrap(SudokuGenerator, "generate_graded", "generator.generate_graded")
+    wrap(Board, "__init__", "board.init")
+    wrap(Board, "draw", "board.draw")
+    wrap(Board, "draw_dirty", "board.draw_dirty")
+    wrap(Board, "hint", "board.hint")
+    # the GUI is only wrapped when it is loaded (as a module or as the script itself), tools stay free of pygame
+    for module_name in ("sudoku", "__main__"):
+        game = getattr(sys.modules.get(module_name), "SudokuGame", None)
+        if game is not None:
+            wrap(game, "in_game_buttons", "game.in_game_buttons")
+            wrap(game, "redraw", "game.redraw")
+            break
+
+def enable(profile_path=None):
+    global enabled, profiler
+    if not enabled:
+        enabled = True
+        install()
+    if profile_path and profiler is None:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+        atexit.register(profiler.dump_stats, profile_path)
+
+def disable():
+    global enabled, profiler
+    enabled = False
+    for owner, attribute, original in reversed(installed):
+        setattr(owner, attribute, original)
+    installed.clear()
+    if profiler is not None:
+        profiler.disable()
+        profiler = None
+
+def reset():
+    counters.clear()
+    timings.clear()
+
+def enable_from_env():
+    # SUDOKU_STATS=1 (or any true value) prints a table at exit, a path ending in .jsonl gets JSON lines instead
+    target = os.environ.get("SUDOKU_STATS", "")
+    profile_path = os.environ.get("SUDOKU_PROFILE") or None
+    if not target and not profile_path:
+        return False
+    enable(profile_path)
+    if target.endswith(".jsonl"):
+        atexit.register(write_jsonl, target)
+    elif target not in ("", "0"):
+        atexit.register(dump)
+    return True
+
+def stats():
+    # a plain dict snapshot, times in milliseconds
+    result = {name: {"count": value} for name, value in counters.items()}
+    for name, (calls, total, slowest) in timings.items():
+        result.setdefault(name, {}).update(calls=calls, total_ms=total * 1000, mean_ms=total / calls * 1000, max_ms=slowest * 1000)
+    return dict(sorted(result.items()))
+
+def dump(stream=None):
+    stream = stream or sys.stderr
+    stream.write(f"{'metric':<40}{'count':>10}{'total ms':>12}{'mean ms':>10}{'max ms':>10}\n")
+    for name, values in stats().items():
+        if "calls" in values:
+            stream.write(f"{name:<40}{values['calls']:>10}{values['total_ms']:>12.2f}{values['mean_ms']:>10.3f}{values['max_ms']:>10.3f}\n")
+        else:
+            stream.write(f"{name:<40}{values['count']:>10}\n")
+
+def write_jsonl(path):
+    # appends one line per metric, all stamped with the same time so runs can be told apart
+    stamp = time.time()
+    with open(path, "a") as f:
+        for name, values in stats().items():
+            f.write(json.dumps({"time": stamp, "metric": name, **values}) + "\n")
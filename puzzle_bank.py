@@ -0,0 +1,153 @@
+import argparse, mmap, os, random, struct
+from colors_and_values import difficulty_settings, difficulty_scores, PUZZLE_BANK_PATH
+from sudoku_generator import generate_many
+
+# Binary puzzle bank: every puzzle is stored with its solution in a fixed size record,
+# so the n-th puzzle of a difficulty is found by arithmetic and read straight out of the mmap.
+#
+# Layout (little endian):
+#   header   magic b"SDKB", version, row_length, section count         struct HEADER
+#   sections difficulty name, removed cells, record offset, record count  struct SECTION, one per difficulty
+#   records  given-cell bitmap (1 bit per cell) then the solution packed as digit - 1 in value_bits bits per cell
+
+MAGIC = b"SDKB"
+VERSION = 1
+HEADER = struct.Struct("<4sHHI")
+SECTION = struct.Struct("<16sIQI")
+
+def value_bits(row_length):
+    return max(1, (row_length - 1).bit_length())
+
+def record_layout(row_length):
+    # returns (bitmap bytes, solution bytes) for one record
+    cells = row_length * row_length
+    return (cells + 7) // 8, (cells * value_bits(row_length) + 7) // 8
+
+def pack_record(puzzle, solution):
+    row_length = len(solution)
+    bits = value_bits(row_length)
+    mask_size, solution_size = record_layout(row_length)
+    givens = 0
+    values = 0
+    for i in range(row_length):
+        for j in range(row_length):
+            cell = i * row_length + j
+            if puzzle[i][j] != 0:
+                givens |= 1 << cell
+            values |= (solution[i][j] - 1) << (cell * bits)
+    return givens.to_bytes(mask_size, "little") + values.to_bytes(solution_size, "little")
+
+def unpack_record(data, row_length):
+    # data is any bytes-like object, e.g. a memoryview slice of the mmap
+    bits = value_bits(row_length)
+    mask_size, solution_size = record_layout(row_length)
+    givens = int.from_bytes(data[:mask_size], "little")
+    values = int.from_bytes(data[mask_size:mask_size + solution_size], "little")
+    digit_mask = (1 << bits) - 1
+    puzzle = []
+    solution = []
+    for i in range(row_length):
+        puzzle_row = []
+        solution_row = []
+        for j in range(row_length):
+            cell = i * row_length + j
+            num = (values >> (cell * bits) & digit_mask) + 1
+            solution_row.append(num)
+            puzzle_row.append(num if givens >> cell & 1 else 0)
+        puzzle.append(puzzle_row)
+        solution.append(solution_row)
+    return puzzle, solution
+
+def write_bank(path, sections, row_length=9):
+    # sections maps a difficulty name to (removed cells, list of (puzzle, solution) pairs)
+    record_size = sum(record_layout(row_length))
+    offset = HEADER.size + SECTION.size * len(sections)
+    # written to a temporary file first so an interrupted build never leaves a broken bank behind
+    with open(path + ".tmp", "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, row_length, len(sections)))
+        for name, (removed, pairs) in sections.items():
+            f.write(SECTION.pack(name.encode("utf-8"), removed, offset, len(pairs)))
+            offset += record_size * len(pairs)
+        for removed, pairs in sections.values():
+            for puzzle, solution in pairs:
+                f.write(pack_record(puzzle, solution))
+    os.replace(path + ".tmp", path)
+
+def build_bank(path, count, workers=None, seed=None, settings=difficulty_settings, scores=difficulty_scores):
+    # generates count unique puzzles for every difficulty, graded into its score band, and writes them to path
+    sections = {}
+    for name, removed in settings.items():
+        pairs = list(generate_many(removed, count, workers=workers, seed=f"{seed}:{name}" if seed is not None else None,
+                                   unique=True, solutions=True, band=scores.get(name)))
+        sections[name] = (removed, pairs)
+    write_bank(path, sections)
+
+class PuzzleBank:
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        try:
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.file.close()
+            raise ValueError(f"{path} is empty, not a puzzle bank")
+        self.view = memoryview(self.data)
+        size = len(self.data)
+        magic, version, self.row_length, section_count = HEADER.unpack_from(self.data, 0) if size >= HEADER.size else (b"", 0, 0, 0)
+        if magic != MAGIC or version != VERSION or HEADER.size + section_count * SECTION.size > size:
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} puzzle bank")
+        self.record_size = sum(record_layout(self.row_length))
+        self.sections = {}
+        for index in range(section_count):
+            name, removed, offset, count = SECTION.unpack_from(self.data, HEADER.size + index * SECTION.size)
+            name = name.rstrip(b"\0").decode("utf-8", "replace")
+            # a truncated file would otherwise hand out records read past its end as empty grids
+            if offset + count * self.record_size > size:
+                self.close()
+                raise ValueError(f"{path} is truncated, its {name} puzzles run past the end")
+            self.sections[name] = (removed, offset, count)
+
+    def close(self):
+        self.view.release()
+        self.data.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def count(self, difficulty):
+        return self.sections[difficulty][2] if difficulty in self.sections else 0
+
+    def get(self, difficulty, index):
+        # O(1): the record is sliced from the mmap without copying the rest of the file
+        removed, offset, count = self.sections[difficulty]
+        if not 0 <= index < count:
+            raise IndexError(f"{difficulty} has {count} puzzles, no puzzle {index}")
+        start = offset + index * self.record_size
+        return unpack_record(self.view[start:start + self.record_size], self.row_length)
+
+    def random(self, difficulty, rng=random):
+        return self.get(difficulty, rng.randrange(self.count(difficulty)))
+
+def open_bank(path=PUZZLE_BANK_PATH):
+    # returns None instead of raising when the bank is missing or unreadable, callers then generate live
+    if not os.path.exists(path):
+        return None
+    try:
+        return PuzzleBank(path)
+    except (OSError, ValueError, struct.error):
+        return None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a puzzle bank file for every difficulty.")
+    parser.add_argument("path", nargs="?", default=PUZZLE_BANK_PATH)
+    parser.add_argument("--count", type=int, default=1000, help="puzzles per difficulty")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", default=None)
+    args = parser.parse_args()
+    build_bank(args.path, args.count, workers=args.workers, seed=args.seed)
+    print(f"wrote {args.count} puzzles per difficulty to {args.path}")
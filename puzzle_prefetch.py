@@ -0,0 +1,70 @@
+import random, threading
+from collections import deque
+from colors_and_values import difficulty_settings, difficulty_scores, PREFETCH_DEPTH
+from sudoku_generator import SudokuGenerator
+
+# Keeps a few ready-made puzzles per difficulty so starting a game never waits on generation.
+# A single daemon thread tops the queues up and sleeps while they are all full.
+
+class PuzzlePrefetcher:
+
+    def __init__(self, settings=difficulty_settings, depth=PREFETCH_DEPTH, unique=True, rng=None):
+        self.settings = dict(settings)
+        self.depth = depth
+        self.unique = unique
+        self.rng = rng if rng is not None else random.Random() # own generator so the worker never touches the global random state
+        self.queues = {difficulty: deque() for difficulty in self.settings}
+        self.condition = threading.Condition()
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        if self.thread is None and self.depth > 0:
+            self.running = True
+            self.thread = threading.Thread(target=self.worker, name="puzzle-prefetch", daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def needs_refill(self):
+        # the emptiest queue is filled first, so the difficulty just played is back in stock soonest
+        lowest = min(self.queues, key=lambda difficulty: len(self.queues[difficulty]))
+        return lowest if len(self.queues[lowest]) < self.depth else None
+
+    def worker(self):
+        while True:
+            with self.condition:
+                while self.running and self.needs_refill() is None:
+                    self.condition.wait()
+                if not self.running:
+                    return
+                difficulty = self.needs_refill()
+            # generating happens outside the lock so get() never blocks on it
+            generator = SudokuGenerator(self.settings[difficulty], rng=self.rng)
+            if self.unique and difficulty in difficulty_scores:
+                if generator.generate_graded(*difficulty_scores[difficulty]) is None:
+                    continue  # nothing landed in the score band, never queue a puzzle from outside it
+            else:
+                generator.fill_values()
+                generator.remove_cells(self.unique)
+            with self.condition:
+                self.queues[difficulty].append(generator.get_board())
+
+    def get(self, difficulty):
+        # returns a ready puzzle, or None if the queue is empty so the caller can generate one itself
+        with self.condition:
+            queue = self.queues.get(difficulty)
+            puzzle = queue.popleft() if queue else None
+            self.condition.notify() # wake the worker to replace what was taken
+        return puzzle
+
+    def ready(self, difficulty):
+        with self.condition:
+            return len(self.queues.get(difficulty, ()))
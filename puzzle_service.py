@@ -0,0 +1,254 @@
+import argparse, asyncio, ipaddress, json, os, random, signal, sys
+from concurrent.futures import ProcessPoolExecutor
+from colors_and_values import difficulty_settings, difficulty_scores
+from sudoku_cli import board_status, format_board, parse_board
+from sudoku_generator import SudokuGenerator
+import sudoku_solver
+
+# Local puzzle service: JSON lines over TCP on localhost or a Unix socket, the puzzle work runs in a process pool.
+#   python puzzle_service.py [--port 8765 | --unix /tmp/sudoku.sock] [--workers N] [--cache 8]
+#
+# One JSON object per line in each direction, responses carry the request's id and may come back out of order:
+#   {"id": 1, "op": "generate", "difficulty": "hard", "solution": true}  ->  {"id": 1, "ok": true, "puzzle": "...", "solution": "..."}
+#   {"id": 2, "op": "solve", "board": "..."}                             ->  {"id": 2, "ok": true, "solution": "..." or null}
+#   {"id": 3, "op": "validate", "board": "..."}                          ->  {"id": 3, "ok": true, "status": "unique"}
+#   {"id": 4, "op": "cancel", "target": 1}                               ->  request 1 answers {"id": 1, "ok": false, "error": "cancelled"}
+#   {"id": 5, "op": "stats"}                                             ->  {"id": 5, "ok": true, "stats": {...}}
+# Boards are 81 characters as in sudoku_cli, '.' or '0' for an empty cell. Errors come back as {"ok": false, "error": "..."}.
+#
+# Backpressure: a connection stops being read while max_pending of its requests are unanswered, and at most
+# max_jobs jobs wait for the pool at once, so a fast client slows down instead of queueing without bound.
+# SIGTERM or SIGINT stops the server and shuts the pool down, so no worker process outlives the service.
+
+DEFAULT_PORT = 8765
+MAX_LINE = 64 * 1024  # longest request line accepted
+
+# the jobs run in worker processes, so they are plain module level functions
+
+def generate_job(difficulty, seed):
+    generator = SudokuGenerator(difficulty_settings[difficulty], rng=random.Random(seed))
+    low, high = difficulty_scores[difficulty]
+    if generator.generate_graded(low, high) is None:
+        raise ValueError(f"no {difficulty} puzzle with a logic score in {low}-{high} found")
+    puzzle = generator.get_board()
+    return format_board(puzzle), format_board(sudoku_solver.solve(puzzle))
+
+def solve_job(board):
+    solution = sudoku_solver.solve(board)
+    return format_board(solution) if solution else None
+
+def validate_job(board):
+    return board_status(board)
+
+class PuzzleService:
+
+    def __init__(self, workers=None, cache_depth=8, max_pending=16, max_jobs=None, pool=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = pool if pool is not None else ProcessPoolExecutor(max_workers=self.workers)
+        self.cache_depth = cache_depth
+        self.max_pending = max_pending
+        self.jobs = asyncio.Semaphore(max_jobs or self.workers * 4)
+        self.cache = {difficulty: asyncio.Queue(max(cache_depth, 1)) for difficulty in difficulty_settings}
+        self.refillers = []
+        self.connections = set()  # handle() tasks of the open connections, cancelled on close()
+        self.counts = {"requests": 0, "errors": 0, "cancelled": 0, "cache_hits": 0, "cache_misses": 0}
+
+    def start(self):
+        # one task per difficulty keeps its cache full, it waits on the full queue instead of generating more
+        if self.cache_depth > 0:
+            self.refillers = [asyncio.create_task(self.refill(difficulty)) for difficulty in self.cache]
+
+    async def close(self):
+        # connections first, their handlers close their writers, then the cache, then the pool once its workers finish
+        for task in list(self.connections) + self.refillers:
+            task.cancel()
+        await asyncio.gather(*self.connections, *self.refillers, return_exceptions=True)
+        self.pool.shutdown(wait=True, cancel_futures=True)
+
+    async def refill(self, difficulty):
+        rng = random.Random()
+        while True:
+            try:
+                item = await self.run(generate_job, difficulty, rng.randrange(2 ** 63))
+            except ValueError:
+                continue  # missed the score band, try another seed
+            await self.cache[difficulty].put(item)
+
+    async def run(self, job, *args):
+        # cancelling the caller cancels the pool job too if it hasn't started yet; one that already started keeps
+        # its slot until it finishes, so max_jobs bounds the work in the pool and not only the callers waiting on it
+        loop = asyncio.get_running_loop()
+        await self.jobs.acquire()
+        def release(future):
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(self.jobs.release)
+        try:
+            future = self.pool.submit(job, *args)
+        except BaseException:
+            self.jobs.release()
+            raise
+        future.add_done_callback(release)
+        return await asyncio.wrap_future(future)
+
+    async def generate(self, request):
+        difficulty = request.get("difficulty", "medium")
+        if difficulty not in self.cache:
+            raise ValueError(f"unknown difficulty {difficulty!r}")
+        queue = self.cache[difficulty]
+        if "seed" not in request and not queue.empty():
+            self.counts["cache_hits"] += 1
+            puzzle, solution = queue.get_nowait()
+        else:
+            # a seed asks for one particular puzzle, so it never comes from the cache
+            self.counts["cache_misses"] += 1
+            puzzle, solution = await self.run(generate_job, difficulty, request.get("seed", random.randrange(2 ** 63)))
+        response = {"puzzle": puzzle}
+        if request.get("solution"):
+            response["solution"] = solution
+        return response
+
+    async def dispatch(self, request):
+        op = request.get("op")
+        if op == "generate":
+            return await self.generate(request)
+        if op == "solve":
+            return {"solution": await self.run(solve_job, parse_board(str(request.get("board", ""))))}
+        if op == "validate":
+            return {"status": await self.run(validate_job, parse_board(str(request.get("board", ""))))}
+        if op == "stats":
+            return {"stats": dict(self.counts, cached={difficulty: queue.qsize() for difficulty, queue in self.cache.items()})}
+        raise ValueError(f"unknown op {op!r}")
+
+    async def answer(self, request, writer, lock):
+        response = {"id": request.get("id")}
+        try:
+            response.update(await self.dispatch(request), ok=True)
+        except asyncio.CancelledError:
+            self.counts["cancelled"] += 1
+            response.update(ok=False, error="cancelled")
+        except (ValueError, KeyError, TypeError) as error:
+            self.counts["errors"] += 1
+            response.update(ok=False, error=str(error))
+        await self.send(writer, lock, response)
+
+    async def send(self, writer, lock, response):
+        async with lock:
+            if writer.is_closing():
+                return
+            writer.write(json.dumps(response).encode("utf-8") + b"\n")
+            try:
+                await writer.drain()  # waits while the client isn't reading, which holds up this connection's requests
+            except ConnectionError:
+                pass
+
+    async def handle(self, reader, writer):
+        # close() cancels the open connections; ending normally then keeps asyncio from logging every cancel as an error
+        task = asyncio.current_task()
+        self.connections.add(task)
+        try:
+            await self.connection(reader, writer)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.connections.discard(task)
+
+    async def connection(self, reader, writer):
+        tasks = {}  # in-flight task -> request id
+        replies = set()  # strong references to the "cancelled" replies sent from finished()
+        pending = asyncio.Semaphore(self.max_pending)
+        lock = asyncio.Lock()
+
+        def finished(task):
+            request_id = tasks.pop(task, None)
+            pending.release()
+            if task.cancelled():
+                # cancelled before it started running, so answer() never got to reply
+                self.counts["cancelled"] += 1
+                reply = asyncio.create_task(self.send(writer, lock, {"id": request_id, "ok": False, "error": "cancelled"}))
+                replies.add(reply)
+                reply.add_done_callback(replies.discard)
+
+        try:
+            while True:
+                await pending.acquire()  # no more reading while max_pending requests are unanswered
+                try:
+                    line = await reader.readline()
+                except ValueError:  # longer than MAX_LINE
+                    await self.send(writer, lock, {"id": None, "ok": False, "error": f"request longer than {MAX_LINE} bytes"})
+                    break
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("a request must be a JSON object")
+                except ValueError as error:
+                    pending.release()
+                    await self.send(writer, lock, {"id": None, "ok": False, "error": f"bad request: {error}"})
+                    continue
+                self.counts["requests"] += 1
+                if request.get("op") == "cancel":
+                    pending.release()
+                    for task, request_id in list(tasks.items()):
+                        if request_id == request.get("target"):
+                            task.cancel()
+                    continue
+                task = asyncio.create_task(self.answer(request, writer, lock))
+                tasks[task] = request.get("id")
+                task.add_done_callback(finished)
+        except ConnectionError:
+            pass
+        finally:
+            # the client is gone or the service is closing: whatever it was still waiting for is cancelled,
+            # the writer is closed before anything is awaited so a second cancel can't leave it open
+            for task in list(tasks):
+                task.cancel()
+            writer.close()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+def check_local(host):
+    if host != "localhost" and not ipaddress.ip_address(host).is_loopback:
+        raise ValueError(f"{host} is not a loopback address, the service only listens on localhost")
+
+async def serve(host="127.0.0.1", port=DEFAULT_PORT, unix=None, workers=None, cache_depth=8, max_pending=16):
+    service = PuzzleService(workers, cache_depth, max_pending)
+    service.start()
+    if unix:
+        server = await asyncio.start_unix_server(service.handle, unix, limit=MAX_LINE)
+        where = unix
+    else:
+        check_local(host)
+        server = await asyncio.start_server(service.handle, host, port, limit=MAX_LINE)
+        where = "%s:%d" % server.sockets[0].getsockname()[:2]
+    print(f"listening on {where}", flush=True)  # the load test reads this line to find a port picked with --port 0
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(signum, stop.set)
+        except NotImplementedError:  # Windows, Ctrl+C still ends the service through KeyboardInterrupt
+            pass
+    async with server:
+        try:
+            await stop.wait()
+        finally:
+            server.close()  # no new connections while the open ones are cancelled
+            await service.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve generate/solve/validate requests as JSON lines on localhost.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="0 picks a free port")
+    parser.add_argument("--unix", metavar="PATH", default=None, help="listen on a Unix socket instead of TCP")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes, default one per CPU")
+    parser.add_argument("--cache", type=int, default=8, help="ready puzzles kept per difficulty, 0 turns the cache off")
+    parser.add_argument("--max-pending", type=int, default=16, help="unanswered requests per connection before it stops being read")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.workers, args.cache, args.max_pending))
+    except KeyboardInterrupt:
+        sys.exit(0)
@@ -0,0 +1,248 @@
+import hashlib, math, os, random, struct
+from operator import itemgetter
+
+# Validity-preserving symmetries of a sudoku: relabelling the digits, reordering the rows inside a band, reordering the
+# bands, the same for columns and stacks, and transposing. They keep a puzzle's solution count, and its logic grade
+# because the grader never depends on cell order, so one generated grid turns into many puzzles, and a canonical
+# form tells when two puzzles are the same one.
+#
+# Boards are list of lists with 0 for empty cells like everywhere else, flat bytes (index = row * n + col) internally.
+# A transform is (source, table): output cell i takes input cell source[i], then digits go through bytes.translate(table).
+
+def flatten(board):
+    return bytes(num for row in board for num in row)
+
+def unflatten(values, row_length):
+    return [list(values[i * row_length:(i + 1) * row_length]) for i in range(row_length)]
+
+def line_order(rng, box_length):
+    # bands (or stacks) in random order, and the lines inside each band in random order
+    bands = list(range(box_length))
+    rng.shuffle(bands)
+    order = []
+    for band in bands:
+        lines = [band * box_length + line for line in range(box_length)]
+        rng.shuffle(lines)
+        order += lines
+    return order
+
+def random_transform(rng=random, row_length=9):
+    box_length = math.isqrt(row_length)
+    rows = line_order(rng, box_length)
+    cols = line_order(rng, box_length)
+    if rng.random() < 0.5:
+        source = [rows[i] * row_length + cols[j] for i in range(row_length) for j in range(row_length)]
+    else:
+        source = [cols[j] * row_length + rows[i] for i in range(row_length) for j in range(row_length)]  # transposed
+    digits = list(range(1, row_length + 1))
+    rng.shuffle(digits)
+    return itemgetter(*source), bytes([0] + digits + [0] * (255 - row_length))
+
+def apply_transform(values, transform):
+    # flat bytes in, flat bytes out, a few microseconds for a 9x9 board
+    source, table = transform
+    return bytes(source(values)).translate(table)
+
+def transform_board(board, transform):
+    return unflatten(apply_transform(flatten(board), transform), len(board))
+
+def variants(puzzle, solution, count, rng=random):
+    # yields count distinct (puzzle, solution) pairs derived from one puzzle, each with the same transform applied to both
+    # solution may be None, the pairs then carry None too
+    n = len(puzzle)
+    puzzle_values = flatten(puzzle)
+    solution_values = flatten(solution) if solution is not None else None
+    seen = {puzzle_values}
+    attempts = 0
+    while len(seen) <= count and attempts < count * 10:  # a puzzle with its own symmetries has fewer distinct variants
+        attempts += 1
+        transform = random_transform(rng, n)
+        values = apply_transform(puzzle_values, transform)
+        if values in seen:
+            continue
+        seen.add(values)
+        yield unflatten(values, n), unflatten(apply_transform(solution_values, transform), n) if solution_values is not None else None
+
+def allowed_rows(used, row_length, box_length):
+    # the first row of a band can come from any unused band, the next ones from the rest of that band
+    if len(used) % box_length == 0:
+        bands = {row // box_length for row in used}
+        return [row for row in range(row_length) if row // box_length not in bands]
+    band = used[len(used) - len(used) % box_length] // box_length
+    return [row for row in range(band * box_length, (band + 1) * box_length) if row not in used]
+
+def permutations(items):
+    if len(items) <= 1:
+        return [tuple(items)]
+    return [(item,) + rest for index, item in enumerate(items) for rest in permutations(items[:index] + items[index + 1:])]
+
+def product(alternatives):
+    # every concatenation of one choice from each list of tuples
+    done = [()]
+    for choices in alternatives:
+        done = [prefix + choice for prefix in done for choice in choices]
+    return done
+
+def relabel_row(row, cols, mapping, label):
+    # the row in the given column order with digits renamed by first appearance, returns (bytes, mapping, next label)
+    mapping = bytearray(mapping)
+    out = bytearray(len(cols))
+    for i, col in enumerate(cols):
+        num = row[col]
+        if num:
+            if not mapping[num]:
+                mapping[num] = label
+                label += 1
+            out[i] = mapping[num]
+    return bytes(out), bytes(mapping), label
+
+def fixed_order(layout, row_length):
+    # the column order once the layout leaves no choice, else None
+    if any(len(group) > 1 for group in layout):
+        return None
+    cols = tuple(cell[0] for group in layout for stack in group for cell in stack if len(cell) == 1)
+    return cols if len(cols) == row_length else None
+
+# The column order is kept partial while the form is built: a layout is a tuple of groups of stacks whose order is
+# still open, a stack a tuple of cells of columns whose order is still open. A row only fixes as much of it as its
+# digits tell apart, so empty rows and sparse boards don't multiply the orders to try.
+
+def read_row(row, layout, mapping, label):
+    # the smallest string the row reads as under any column order the layout allows, digits renamed in order of
+    # first appearance, and every (layout, mapping, next label) that reads it that way
+    nums = [num for num in row if num]
+    if len(nums) != len(set(nums)):
+        raise ValueError("a digit repeats in a row or column, there is no canonical form")
+    fresh_mark = len(row) + 1  # a digit seen for the first time gets a label above every one given so far
+    refined = []  # one list of alternative group sequences per run of tied stacks
+    for group in layout:
+        stacks = []
+        for stack in group:
+            marks = []
+            cells = []  # per cell, every ordering of it the row allows
+            for cell in stack:
+                zeros = tuple(col for col in cell if row[col] == 0)
+                known = sorted((col for col in cell if row[col] and mapping[row[col]]), key=lambda col: mapping[row[col]])
+                fresh = [col for col in cell if row[col] and not mapping[row[col]]]
+                marks += [0] * len(zeros) + [mapping[row[col]] for col in known] + [fresh_mark] * len(fresh)
+                fixed = ((zeros,) if zeros else ()) + tuple((col,) for col in known)
+                cells.append([fixed + tuple((col,) for col in order) for order in permutations(fresh)])
+            stacks.append((bytes(marks), [(option,) for option in product(cells)]))
+        stacks.sort(key=lambda item: item[0])
+        start = 0
+        while start < len(stacks):
+            stop = start
+            while stop < len(stacks) and stacks[stop][0] == stacks[start][0]:
+                stop += 1
+            run = stacks[start:stop]
+            if fresh_mark in run[0][0]:
+                # new digits are named in reading order, so tied stacks holding them each take a fixed place
+                refined.append([tuple((stack,) for stack in order_stacks)
+                                for order in permutations(run) for order_stacks in product([options for _, options in order])])
+            else:
+                refined.append([(tuple(options[0][0] for _, options in run),)])
+            start = stop
+    string = None
+    readings = []
+    for new_layout in product(refined):
+        row_mapping = bytearray(mapping)
+        row_label = label
+        out = bytearray()
+        for group in new_layout:
+            for stack in group:
+                for cell in stack:
+                    for col in cell:
+                        num = row[col]
+                        if num and not row_mapping[num]:
+                            row_mapping[num] = row_label
+                            row_label += 1
+                        out.append(row_mapping[num] if num else 0)
+        string = bytes(out)
+        readings.append((new_layout, bytes(row_mapping), row_label))
+    return string, readings
+
+def canonical_form(board):
+    # the smallest row-by-row string (empty cells first, digits renamed in order of first appearance) over every
+    # symmetry, so isomorphic puzzles get the same form; built one row at a time, keeping only the tied best choices
+    n = len(board)
+    box_length = math.isqrt(n)
+    grids = (tuple(tuple(row) for row in board), tuple(zip(*board)))
+    start = (tuple((tuple(range(stack * box_length, (stack + 1) * box_length)),) for stack in range(box_length)),)
+    states = [(grid, (), start, bytes(n + 1), 1) for grid in grids]  # (grid, rows used, layout, digit mapping, next label)
+    form = bytearray()
+    for _ in range(n):
+        best = None
+        next_states = {}
+        for grid, used, layout, mapping, label in states:
+            cols = fixed_order(layout, n)
+            for row in allowed_rows(used, n, box_length):
+                if cols is not None:
+                    out, row_mapping, row_label = relabel_row(grid[row], cols, mapping, label)
+                    readings = [(layout, row_mapping, row_label)]
+                else:
+                    out, readings = read_row(grid[row], layout, mapping, label)
+                if best is None or out < best:
+                    best, next_states = out, {}
+                if out == best:
+                    for row_layout, row_mapping, row_label in readings:
+                        # the same rows in another order finish the same way, so such states are kept once
+                        key = (grid is grids[1], frozenset(used + (row,)), row_layout, row_mapping, row_label)
+                        next_states.setdefault(key, (grid, used + (row,), row_layout, row_mapping, row_label))
+        form += best
+        states = list(next_states.values())
+    return bytes(form)
+
+def canonical_key(board):
+    return hashlib.blake2b(canonical_form(board), digest_size=16).digest()
+
+# On-disk dedup index: a header then one 16 byte blake2b digest of the canonical form per puzzle, appended as
+# puzzles come in. The digests are loaded into a set when the index is opened, so a lookup never touches the disk.
+
+INDEX_MAGIC = b"SDKC"
+INDEX_VERSION = 1
+INDEX_HEADER = struct.Struct("<4sHH")
+KEY_SIZE = 16
+
+class CanonicalIndex:
+
+    def __init__(self, path, row_length=9):
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, "a+b")
+        if new:
+            self.file.write(INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, row_length))
+            self.file.flush()
+        self.file.seek(0)
+        data = self.file.read()
+        magic, version, self.row_length = INDEX_HEADER.unpack_from(data, 0) if len(data) >= INDEX_HEADER.size else (b"", 0, 0)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION or self.row_length != row_length:
+            self.file.close()
+            raise ValueError(f"{path} is not a version {INDEX_VERSION} index of {row_length}x{row_length} puzzles")
+        end = len(data) - (len(data) - INDEX_HEADER.size) % KEY_SIZE  # drops a record cut short by a crash
+        if end != len(data):
+            self.file.truncate(end)
+        self.keys = {data[start:start + KEY_SIZE] for start in range(INDEX_HEADER.size, end, KEY_SIZE)}
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, board):
+        return canonical_key(board) in self.keys
+
+    def add(self, board):
+        # True if the puzzle is new (and now recorded), False if it or an isomorphic copy is already in the index
+        key = canonical_key(board)
+        if key in self.keys:
+            return False
+        self.keys.add(key)
+        self.file.write(key)
+        self.file.flush()
+        return True
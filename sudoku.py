@@ -1,167 +1,70 @@
-import sys, pygame
-from turtle import Screen
-from sudoku_generator import *
+import os, time
+import instrumentation
+from functools import lru_cache
 from colors_and_values import *
-
-#Initialize Pygame
-pygame.init()
-Screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Welcome to Sudoku")
-
-#Initialize fonts
-num_font = pygame.font.Font(None, 50)
-start_title_font = pygame.font.Font(None, 85)
-subtitle_font = pygame.font.Font(None, 60)
-button_font = pygame.font.Font(None, 50)
-
-difficulty_settings = {
-    "easy": 30,
-    "medium": 40,
-    "hard": 50
-}
-
-#Cell Class
-class Cell:
-    def __init__(self, value, row, col, screen):
-        self.value = value
-        self.sketched_value = 0  # sketching temp numbers
-        self.row = row
-        self.col = col
-        self.screen = screen
-        self.selected = False
-        self.is_fixed = value != 0  # if the cell is fixed, it cannot be changed
-
-    def set_cell_value(self, value):
-        if not self.is_fixed:
-            self.value = value
-
-    def set_sketched_value(self, value):
-        self.sketched_value = value #fix: value was set to value not sketched_value
-
-    #Draw method for one sudoku cell
-    def draw(self):
-        gap = WIDTH // 9
-        x = self.col * gap
-        y = self.row * gap
-
-        if self.selected:
-            pygame.draw.rect(self.screen, LINE_COLOR, (x, y, gap, gap), 3)
-
-        if self.value != 0:
-            text = num_font.render(str(self.value), True, TITLE_COLOR)
-            self.screen.blit(text, (x + gap // 2 - text.get_width() / 2, y + gap // 2 - text.get_height() / 2))
-        elif self.sketched_value != 0:
-            text = num_font.render(str(self.sketched_value), True, SKETCH_COLOR)
-            self.screen.blit(text, (x + 5, y + 5))
-        if self.is_fixed:
-            pygame.draw.rect(self.screen, LINE_COLOR, (x, y, gap, gap), 2)
-
-#Board Class
-class Board:
-    def __init__(self, width, height, screen, difficulty):
-        # just initializes the board and sets the difficulty
-        self.width = width
-        self.height = height
-        self.screen = screen
-        self.selected_cell = None
-        # setting the opening screen
-        self.cells = [[Cell(0, i, j, screen) for j in range(9)] for i in range(9)]
-        self.sudoku_generator = SudokuGenerator(difficulty_settings[difficulty], 9)
-        self.sudoku_generator.fill_values()
-        self.sudoku_generator.remove_cells()
-        self.load_board(self.sudoku_generator.get_board())
-        # Store a deep copy of the initial board state
-        self.initial_board = [row[:] for row in self.sudoku_generator.get_board()]
-
-    def draw(self):
-        #draws sudoku board
-        gap = self.width // 9
-        #Draws each cell in row
-        for row in self.cells:
-            for cell in row:
-                cell.draw()
-
-        for i in range(9+1):
-            line_width = 4 if i % 3 == 0  else 1
-            pygame.draw.line(self.screen, LINE_COLOR, (0, i * gap), (9 * gap, i * gap), line_width)
-            pygame.draw.line(self.screen, LINE_COLOR, (i * gap, 0), (i * gap, 9 * gap), line_width)
-
-    def load_board(self, board):
-        for i in range(9):
-            for j in range(9):
-                svalue = board[i][j]
-                self.cells[i][j].value = svalue
-                self.cells[i][j].is_fixed = svalue != 0  # if the cell is fixed, it cannot be changed
-
-    def select(self, row, col):
-        for r in self.cells:
-            for cell in r:
-                cell.selected = False
-        self.cells[row][col].selected = True
-        self.selected_cell = (row, col)
-
-    def sketch(self, value):
-        if self.selected_cell:
-            row, col = self.selected_cell
-            if not self.cells[row][col].is_fixed:
-                self.cells[row][col].set_sketched_value(value)
-
-    def submit_guess(self):
-        if self.selected_cell:
-            row, col = self.selected_cell
-            if self.cells[row][col].sketched_value != 0:
-                self.cells[row][col].set_cell_value(self.cells[row][col].sketched_value)
-                self.cells[row][col].sketched_value = 0
-
-    def reset_to_original(self):
-        self.load_board(self.initial_board)
-
-    def check_is_full(self):
-        for row in self.cells:
-            for j in row:
-                if j.value == 0:
-                    return False
-        return True
-
-    def check_is_correct(self):
-        for row in self.cells:
-            if sorted([cell.value for cell in row]) != list(range(1, 10)):
-                return False
-        for col in range(9):
-            if sorted([self.cells[row][col].value for row in range(9)]) != list(range(1, 10)):
-                return False
-        for box_row in range(0, 9, 3):
-            for box_col in range(0, 9, 3):
-                grid_values = []
-                for r in range(3):
-                    for c in range(3):
-                        grid_values.append(self.cells[box_row + r][box_col + c].value)
-
-                if sorted(grid_values) != list(range(1, 10)):
-                    return False
-        return True
+from game_save import delete_save, load_game, save_game
+from puzzle_bank import open_bank
+from puzzle_prefetch import PuzzlePrefetcher
+from sudoku_board import Board
+
+# pygame, the window and the fonts are loaded by init_display() when the GUI starts, not at import time
+pygame = None
+Screen = None
+start_title_font = None
+subtitle_font = None
+button_font = None
+
+def init_display():
+    global pygame, Screen, start_title_font, subtitle_font, button_font
+    if Screen is not None:
+        return Screen
+    #Initialize Pygame
+    import pygame
+    pygame.init()
+    Screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Welcome to Sudoku")
+
+    #Initialize fonts
+    start_title_font = pygame.font.Font(None, 85)
+    subtitle_font = pygame.font.Font(None, 60)
+    button_font = pygame.font.Font(None, 50)
+    return Screen
+
+#Text never changes between frames, so each string is rendered once and reused
+@lru_cache(maxsize=None)
+def render_text(font, text, color):
+    return font.render(text, True, color)
 
 class SudokuGame:
-    def __init__(self):
+    save_path = SAVE_PATH
+    max_fps = MAX_FPS # caps how often a burst of events can trigger a redraw, 0 for no cap
+
+    def __init__(self, puzzles=None):
+        init_display()
         self.running = True
         self.state = 'start'
         self.board = None
         self.difficulty = None
+        # puzzles is anything with get(difficulty), e.g. the fixed puzzles of an input replay
+        self.bank = open_bank() if puzzles is None else None # None when there is no bank file, boards are then generated live
+        # without a bank, a background thread keeps puzzles ready for every difficulty
+        self.prefetcher = PuzzlePrefetcher().start() if puzzles is None and self.bank is None else puzzles
+        self.button_layer = None  # cached in-game button strip
 
     def start_screen(self):
         Screen.fill(BACKGROUND)
 
         # Initialize and Draw Title
-        title_text = start_title_font.render("Welcome to Sudoku", True, TITLE_COLOR)
+        title_text = render_text(start_title_font, "Welcome to Sudoku", TITLE_COLOR)
         Screen.blit(title_text, title_text.get_rect(center=(WIDTH // 2, HEIGHT // 2 - 150)))
 
-        subtitle_text= subtitle_font.render("Select Game Mode:", True, TITLE_COLOR)
+        subtitle_text= render_text(subtitle_font, "Select Game Mode:", TITLE_COLOR)
         Screen.blit(subtitle_text, subtitle_text.get_rect(center=(WIDTH // 2, HEIGHT // 2 - 10)))
 
         # Initialize Text For Buttons
-        easy_text = button_font.render("Easy", True, BACKGROUND)
-        medium_text = button_font.render("Medium", True, BACKGROUND)
-        hard_text = button_font.render("Hard", True, BACKGROUND)
+        easy_text = render_text(button_font, "Easy", BACKGROUND)
+        medium_text = render_text(button_font, "Medium", BACKGROUND)
+        hard_text = render_text(button_font, "Hard", BACKGROUND)
 
         # Initialize Buttons
         button_width = 150
@@ -187,6 +90,10 @@ class SudokuGame:
         Screen.blit(hard_text, (hard_button.x + (hard_button.width - hard_text.get_width()) // 2,
                                 hard_button.y + (hard_button.height - hard_text.get_height()) // 2))
 
+        if os.path.exists(self.save_path):
+            resume_text = render_text(button_font, "Press Enter to resume", TITLE_COLOR)
+            Screen.blit(resume_text, resume_text.get_rect(center=(WIDTH // 2, button_y + button_height + 60)))
+
         pygame.display.update()
         return easy_button, medium_button, hard_button
 
@@ -205,13 +112,20 @@ class SudokuGame:
         restart_button = pygame.Rect(x_offset + button_width + button_spacing, button_y, button_width, button_height)
         exit_button = pygame.Rect(x_offset + (button_width + button_spacing) * 2, button_y, button_width, button_height)
 
+        # the button strip is drawn once and then blitted from the cache
+        strip = pygame.Rect(0, self.board.height, WIDTH, HEIGHT - self.board.height)
+        if self.button_layer is not None:
+            Screen.blit(self.button_layer, strip)
+            return reset_button, restart_button, exit_button
+
+        Screen.fill(BACKGROUND, strip)
         pygame.draw.rect(Screen, BACKGROUND, reset_button)
         pygame.draw.rect(Screen, BACKGROUND, restart_button)
         pygame.draw.rect(Screen, BACKGROUND, exit_button)
 
-        reset_text = button_font.render("Reset", True, TITLE_COLOR)
-        restart_text = button_font.render("Restart", True, TITLE_COLOR)
-        exit_text = button_font.render("Exit", True, TITLE_COLOR)
+        reset_text = render_text(button_font, "Reset", TITLE_COLOR)
+        restart_text = render_text(button_font, "Restart", TITLE_COLOR)
+        exit_text = render_text(button_font, "Exit", TITLE_COLOR)
 
         Screen.blit(reset_text, (reset_button.x + (button_width - reset_text.get_width()) // 2,
                                  reset_button.y + (button_height - reset_text.get_height()) // 2))
@@ -219,7 +133,7 @@ class SudokuGame:
                                    restart_button.y + (button_height - restart_text.get_height()) // 2))
         Screen.blit(exit_text, (exit_button.x + (button_width - exit_text.get_width()) // 2,
                                 exit_button.y + (button_height - exit_text.get_height()) // 2))
-        pygame.display.update()
+        self.button_layer = Screen.subsurface(strip).copy()
 
         return reset_button, restart_button, exit_button
 
@@ -227,40 +141,39 @@ class SudokuGame:
         # Fill background
         Screen.fill(BACKGROUND)
 
-        win_text = start_title_font.render("Game Won!", True, TITLE_COLOR)
+        win_text = render_text(start_title_font, "Game Won!", TITLE_COLOR)
         Screen.blit(win_text, win_text.get_rect(center=(WIDTH // 2, HEIGHT // 2 - 10)))
 
         #Exit Button
         exit_button = pygame.Rect(WIDTH / 2 - 75, HEIGHT/2 + 50, 150, 50)
         pygame.draw.rect(Screen, TITLE_COLOR, exit_button)
-        exit_text = button_font.render("Exit", True, BACKGROUND)
+        exit_text = render_text(button_font, "Exit", BACKGROUND)
         Screen.blit(exit_text, (exit_button.x + (exit_button.width - exit_text.get_width()) // 2,
                                 exit_button.y + (exit_button.height - exit_text.get_height()) // 2))
 
         pygame.display.update()
         waiting = True
         while waiting:
-            for event in pygame.event.get():
+            for event in self.wait_for_events():
                 if event.type == pygame.QUIT:
                     self.running = False
                     waiting = False
                 elif event.type == pygame.MOUSEBUTTONDOWN:
-                    pos = pygame.mouse.get_pos()
-                    if exit_button.collidepoint(pos):
-                        pygame.quit()
-                        sys.exit()
+                    if exit_button.collidepoint(event.pos):
+                        self.running = False
+                        waiting = False
 
     def game_lose_screen(self):
         # Fill background
         Screen.fill(BACKGROUND)
 
-        lose_text = start_title_font.render("Game Over :(", True, TITLE_COLOR)
+        lose_text = render_text(start_title_font, "Game Over :(", TITLE_COLOR)
         Screen.blit(lose_text, lose_text.get_rect(center=(WIDTH // 2, HEIGHT // 2 - 10)))
 
         #Restart Button
         restart_button = pygame.Rect(WIDTH / 2 - 75, HEIGHT / 2 + 51, 150, 50)
         pygame.draw.rect(Screen, BACKGROUND, restart_button)
-        restart_text = button_font.render("Restart", True, TITLE_COLOR)
+        restart_text = render_text(button_font, "Restart", TITLE_COLOR)
         # Center the "Restart" text inside the button
         Screen.blit(restart_text, (restart_button.x + (restart_button.width - restart_text.get_width()) // 2,
                                    restart_button.y + (restart_button.height - restart_text.get_height()) // 2))
@@ -269,13 +182,12 @@ class SudokuGame:
 
         waiting = True
         while waiting:
-            for event in pygame.event.get():
+            for event in self.wait_for_events():
                 if event.type == pygame.QUIT:
                     self.running = False
                     waiting = False
                 elif event.type == pygame.MOUSEBUTTONDOWN:
-                    pos = pygame.mouse.get_pos()
-                    if restart_button.collidepoint(pos):
+                    if restart_button.collidepoint(event.pos):
                         self.state = 'start'
                         waiting = False
 
@@ -299,59 +211,107 @@ class SudokuGame:
         return False
 
 
-    def run_game(self, difficulty):
-        self.difficulty = difficulty
-        self.board = Board(WIDTH, GRID_HEIGHT, Screen, difficulty)
-        self.state = 'playing'
-
-        while self.state == 'playing':
-            # Board and buttons
-            Screen.fill(BACKGROUND)
+    def redraw(self):
+        # full redraw only after a new board or a reset, otherwise just the changed cells
+        if self.board.full_redraw:
             self.board.draw()
             self.in_game_buttons()
             pygame.display.update()
+        else:
+            rects = self.board.draw_dirty()
+            if rects:
+                pygame.display.update(rects)
+
+    def wait_for_events(self):
+        # blocks until something happens instead of spinning, then takes everything else that is queued
+        return [pygame.event.wait()] + pygame.event.get()
+
+    def checkpoint(self, force=False):
+        # saves the game every CHECKPOINT_EDITS edits instead of copying the board on every move
+        if force or self.board.edits - self.saved_edits >= CHECKPOINT_EDITS:
+            save_game(self.board, self.save_path)
+            self.saved_edits = self.board.edits
+
+    def run_game(self, difficulty, board=None):
+        self.difficulty = difficulty
+        if board is None:
+            puzzle = self.prefetcher.get(difficulty) if self.prefetcher else None
+            board = Board(WIDTH, GRID_HEIGHT, Screen, difficulty, self.bank, puzzle)
+        self.board = board
+        self.saved_edits = board.edits
+        self.state = 'playing'
+
+        clock = pygame.time.Clock()
+        received = None  # when the events behind the next frame arrived, only set while instrumentation is on
 
-            for event in pygame.event.get():
+        while self.state == 'playing':
+            self.redraw()
+            if received is not None:
+                instrumentation.add_time("game.event_to_frame", time.perf_counter() - received)
+            clock.tick(self.max_fps)
+
+            events = self.wait_for_events()
+            received = time.perf_counter() if instrumentation.enabled else None
+            if received is not None:
+                instrumentation.count("game.events", len(events))
+            for event in events:
                 if event.type == pygame.QUIT:
+                    self.checkpoint(force=True)
                     self.running = False
                     self.state = 'exit'
                 elif event.type == pygame.MOUSEBUTTONDOWN:
-                    pos = pygame.mouse.get_pos()
+                    pos = event.pos
                     grid_height = HEIGHT - 100
-                    row, col = pos[1] // (grid_height // 9), pos[0] // (WIDTH // 9)
+                    n = self.board.row_length
+                    row, col = pos[1] // (grid_height // n), pos[0] // (WIDTH // n)
                     # check if click is within the grid
-                    if pos[1] < grid_height and row < 9 and col < 9:
+                    if pos[1] < grid_height and row < n and col < n:
                         self.board.select(row, col)
 
                     # Check if the in game buttons are clicked
                     if self.is_button_clicked('Reset', pos):
                         self.board.reset_to_original()
                     elif self.is_button_clicked('Exit', pos):
+                        self.checkpoint(force=True)
                         self.running = False
                         self.state = 'exit'
                     elif self.is_button_clicked('Restart', pos):
+                        delete_save(self.save_path)
                         self.state = 'start'
                 elif event.type == pygame.KEYDOWN:
                     if self.board.selected_cell and event.key == pygame.K_UP:
                         if self.board.selected_cell[0] > 0:
                             self.board.select(self.board.selected_cell[0] - 1, self.board.selected_cell[1])
                     elif self.board.selected_cell and event.key == pygame.K_DOWN:
-                        if self.board.selected_cell[0] < 8:
+                        if self.board.selected_cell[0] < self.board.row_length - 1:
                             self.board.select(self.board.selected_cell[0] + 1, self.board.selected_cell[1])
                     elif self.board.selected_cell and event.key == pygame.K_LEFT:
                         if self.board.selected_cell[1] > 0:
                             self.board.select(self.board.selected_cell[0], self.board.selected_cell[1] - 1)
                     elif self.board.selected_cell and event.key == pygame.K_RIGHT:
-                        if self.board.selected_cell[1] < 8:
+                        if self.board.selected_cell[1] < self.board.row_length - 1:
                             self.board.select(self.board.selected_cell[0], self.board.selected_cell[1] + 1)
-                    elif pygame.K_1 <= event.key <= pygame.K_9:
-                        value = event.key - pygame.K_0
-                        self.board.sketch(value)
+                    elif pygame.K_0 <= event.key <= pygame.K_9:
+                        self.board.type_digit(event.key - pygame.K_0)
                     elif event.key == pygame.K_RETURN:
                         self.board.submit_guess()
+                    elif event.key == pygame.K_h:
+                        self.board.show_hint()
+                    elif event.key == pygame.K_p:
+                        self.board.toggle_marks()
+                    elif event.key == pygame.K_z and event.mod & pygame.KMOD_CTRL:
+                        if event.mod & pygame.KMOD_SHIFT:
+                            self.board.redo()
+                        else:
+                            self.board.undo()
+                    elif event.key == pygame.K_y and event.mod & pygame.KMOD_CTRL:
+                        self.board.redo()
+            if self.state == 'playing':
+                self.checkpoint()
 
             # checks if the board is full and if it is correct
             if self.board.check_is_full():
+                delete_save(self.save_path)
                 if self.board.check_is_correct():
                     self.game_win_screen()
                     self.state = 'start'
@@ -364,14 +324,15 @@ class SudokuGame:
             if self.state == 'start':
                 # Pass screen explicitly to start_screen
                 easy_button, medium_button, hard_button = self.start_screen()
+                resumed = None
                 waiting = True
                 while waiting:
-                    for event in pygame.event.get():
+                    for event in self.wait_for_events():
                         if event.type == pygame.QUIT:
                             self.running = False
                             waiting = False
                         elif event.type == pygame.MOUSEBUTTONDOWN:
-                            pos = pygame.mouse.get_pos()
+                            pos = event.pos
                             if easy_button.collidepoint(pos):
                                 self.difficulty = 'easy'
                                 waiting = False
@@ -381,10 +342,18 @@ class SudokuGame:
                             elif hard_button.collidepoint(pos):
                                 self.difficulty = 'hard'
                                 waiting = False
-
-                if self.difficulty:
+                        elif event.type == pygame.KEYDOWN and event.key == pygame.K_RETURN:
+                            resumed = load_game(WIDTH, GRID_HEIGHT, Screen, self.save_path) # None without a usable save
+                            waiting = resumed is None
+
+                if not self.running:
+                    break # closed from the start screen, self.difficulty may still be the last game's
+                if resumed is not None:
+                    self.run_game(resumed.difficulty, resumed)
+                elif self.difficulty:
                     self.run_game(self.difficulty)
 
 if __name__ == "__main__":
+    instrumentation.enable_from_env() # SUDOKU_STATS / SUDOKU_PROFILE, see instrumentation.py
     game = SudokuGame()
     game.run()
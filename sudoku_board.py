@@ -0,0 +1,553 @@
+import math
+from functools import lru_cache
+from board_model import BoardModel
+from colors_and_values import *
+from sudoku_generator import SudokuGenerator
+from sudoku_grader import LogicGrader, layout
+
+# Board and Cell game logic. Nothing here imports pygame at module level: the drawing methods import it
+# when they are first called, so tools can use Board headless (screen=None) without a display.
+
+digit_glyphs = {}
+
+#Glyph atlas: digits 1-n rendered once per colour and board size, index 0 is unused
+def get_digit_glyphs(row_length=9):
+    if row_length not in digit_glyphs:
+        import pygame
+        num_font = pygame.font.Font(None, 50 * 9 // max(row_length, 9))  # smaller digits for smaller cells
+        digit_glyphs[row_length] = {color: [None] + [num_font.render(str(num), True, color) for num in range(1, row_length + 1)]
+                                    for color in (TITLE_COLOR, SKETCH_COLOR)}
+    return digit_glyphs[row_length]
+
+mark_glyphs = {}
+
+#smaller digits for the pencil marks, one per candidate in a box_length x box_length grid inside the cell
+def get_mark_glyphs(row_length=9):
+    if row_length not in mark_glyphs:
+        import pygame
+        mark_font = pygame.font.Font(None, max(10, 20 * 9 // row_length))
+        mark_glyphs[row_length] = [None] + [mark_font.render(str(num), True, SKETCH_COLOR) for num in range(1, row_length + 1)]
+    return mark_glyphs[row_length]
+
+#Cell Class: a thin view over one index of the board's BoardModel
+class Cell:
+    __slots__ = ("model", "index", "row", "col", "screen", "selected", "conflict")
+
+    def __init__(self, value, row, col, screen, model=None):
+        self.model = model if model is not None else BoardModel(9)
+        self.index = row * self.model.row_length + col
+        self.row = row
+        self.col = col
+        self.screen = screen
+        self.selected = False
+        self.conflict = False  # set by the board when the value repeats in its row, column or box
+        if value != 0:
+            self.value = value
+            self.is_fixed = True  # if the cell is fixed, it cannot be changed
+
+    @property
+    def value(self):
+        return self.model.values[self.index]
+
+    @value.setter
+    def value(self, value):
+        self.model.values[self.index] = value
+
+    @property
+    def sketched_value(self):
+        return self.model.sketches[self.index]  # sketching temp numbers
+
+    @sketched_value.setter
+    def sketched_value(self, value):
+        self.model.sketches[self.index] = value
+
+    @property
+    def is_fixed(self):
+        return self.model.fixed[self.index] == 1
+
+    @is_fixed.setter
+    def is_fixed(self, fixed):
+        self.model.fixed[self.index] = fixed
+
+    def set_cell_value(self, value):
+        if not self.is_fixed:
+            self.value = value
+
+    def set_sketched_value(self, value):
+        self.sketched_value = value #fix: value was set to value not sketched_value
+
+    #Draw method for one sudoku cell, onto the screen unless another surface is given
+    def draw(self, surface=None):
+        import pygame
+        surface = surface or self.screen
+        digit_glyphs = get_digit_glyphs(self.model.row_length)
+        gap = WIDTH // self.model.row_length
+        x = self.col * gap
+        y = self.row * gap
+
+        if self.selected:
+            pygame.draw.rect(surface, LINE_COLOR, (x, y, gap, gap), 3)
+
+        if self.value != 0:
+            text = digit_glyphs[TITLE_COLOR][self.value]
+            surface.blit(text, (x + gap // 2 - text.get_width() / 2, y + gap // 2 - text.get_height() / 2))
+        elif self.sketched_value != 0:
+            text = digit_glyphs[SKETCH_COLOR][self.sketched_value]
+            surface.blit(text, (x + 5, y + 5))
+        if self.is_fixed:
+            pygame.draw.rect(surface, LINE_COLOR, (x, y, gap, gap), 2)
+        if self.conflict:
+            pygame.draw.rect(surface, CONFLICT_COLOR, (x + 4, y + 4, gap - 8, gap - 8), 3)
+
+#the cells sharing a row, column or box with each cell (20 of them on a 9x9 board)
+@lru_cache(maxsize=None)
+def peers_for(row_length):
+    box = int(math.sqrt(row_length))
+    return [[[(r, c) for r in range(row_length) for c in range(row_length)
+              if (r, c) != (row, col) and (r == row or c == col or (r // box == row // box and c // box == col // box))]
+             for col in range(row_length)] for row in range(row_length)]
+
+PEERS = peers_for(9)
+
+GRADED_ATTEMPTS = 20  # fresh grids tried for a puzzle in the score band, hard needs about 3 on average
+
+def removed_for(difficulty, row_length):
+    # difficulty_settings counts are for 9x9, larger boards blank the same share of their cells
+    return round(difficulty_settings[difficulty] * row_length * row_length / 81)
+
+#Board Class
+class Board:
+    def __init__(self, width, height, screen, difficulty, bank=None, puzzle=None, row_length=9):
+        # just initializes the board and sets the difficulty
+        self.difficulty = difficulty
+        self.row_length = len(puzzle) if puzzle is not None else row_length
+        self.box_length = int(math.sqrt(self.row_length))
+        self.peers = peers_for(self.row_length)
+        self.width = width
+        self.height = height
+        self.screen = screen
+        self.selected_cell = None
+        self.typed = 0  # first digit of a two-digit value being typed, boards above 9x9 only
+        self.dirty = set()  # cells that changed since the last draw
+        self.full_redraw = True  # set when the whole board has to be drawn again
+        self.background = None  # grid lines and fixed clues, rebuilt only when the puzzle changes
+        self.background_key = None  # the clues the background was built for
+        self.conflicts = set()  # cells whose value repeats in their row, column or box
+        self.show_marks = False  # draw every empty cell's candidates as pencil marks
+        self.moves = []  # (index, old value, new value, old sketch, new sketch) for every edit, in order
+        self.position = 0  # moves[:position] are applied, the rest can be redone
+        self.edits = 0  # edits, undos and redos so far, lets the game checkpoint every few of them
+        # one compact model holds the values, clues and sketches, the generator writes straight into it
+        n = self.row_length
+        self.model = BoardModel(n)
+        self.cells = [[Cell(0, i, j, screen, self.model) for j in range(n)] for i in range(n)]
+        self.sudoku_generator = SudokuGenerator(removed_for(difficulty, n), n, model=self.model)
+        if puzzle is not None:
+            # a pre-generated grid, e.g. from the prefetch queue
+            self.sudoku_generator.board = puzzle
+        elif bank is not None and bank.row_length == n and bank.count(difficulty) > 0:
+            # O(1) lookup in the pre-generated bank instead of generating a new puzzle
+            self.sudoku_generator.board = bank.random(difficulty)[0]
+        elif n == 9 and difficulty in difficulty_scores:
+            # unique and within the difficulty's score band; if that keeps missing, an ungraded unique puzzle
+            # rather than keeping the player waiting on more attempts
+            if self.sudoku_generator.generate_graded(*difficulty_scores[difficulty], attempts=GRADED_ATTEMPTS) is None:
+                self.sudoku_generator.reset_board()
+                self.sudoku_generator.fill_values()
+                self.sudoku_generator.remove_cells(unique=True)
+        else:
+            self.sudoku_generator.fill_values()
+            self.sudoku_generator.remove_cells(unique=True) # only keeps removals that leave one solution
+        self.model.fix_givens()
+        self.puzzle_loaded()
+        # Store a snapshot of the initial board state
+        self.initial_values = self.model.snapshot()
+
+    @property
+    def initial_board(self):
+        n = self.model.row_length
+        return [list(self.initial_values[i * n:(i + 1) * n]) for i in range(n)]
+
+    def draw(self):
+        #draws sudoku board: the cached background, then only the cells the player can change
+        if self.background is None:
+            self.build_background()
+        self.screen.blit(self.background, (0, 0))
+        model = self.model
+        # the player's values and sketches come straight from the model planes, plus the selected and conflicting cells
+        to_draw = {index for index, (value, fixed, sketch) in enumerate(zip(model.values, model.fixed, model.sketches))
+                   if not fixed and (value != 0 or sketch != 0)}
+        n = self.row_length
+        to_draw.update(row * n + col for row, col in self.conflicts)
+        if self.selected_cell:
+            to_draw.add(self.selected_cell[0] * n + self.selected_cell[1])
+        if self.show_marks:
+            to_draw.update(index for index, value in enumerate(model.values) if value == 0)
+        for index in to_draw:
+            self.cells[index // n][index % n].draw()
+            self.draw_marks(index // n, index % n)
+        self.dirty.clear()
+        self.full_redraw = False
+
+    def build_background(self):
+        import pygame
+        self.background = pygame.Surface((self.width, self.height))
+        self.background.fill(BACKGROUND)
+        for row in self.cells:
+            for cell in row:
+                if cell.is_fixed:
+                    cell.draw(self.background)
+        self.draw_grid_lines(self.background)
+
+    def draw_grid_lines(self, surface):
+        import pygame
+        n = self.row_length
+        gap = self.width // n
+        for i in range(n+1):
+            line_width = 4 if i % self.box_length == 0  else 1
+            pygame.draw.line(surface, LINE_COLOR, (0, i * gap), (n * gap, i * gap), line_width)
+            pygame.draw.line(surface, LINE_COLOR, (i * gap, 0), (i * gap, n * gap), line_width)
+
+    def draw_dirty(self):
+        # redraws only the cells that changed and returns their rects for pygame.display.update
+        import pygame
+        gap = self.width // self.row_length
+        rects = []
+        for row, col in self.dirty:
+            rect = pygame.Rect(col * gap, row * gap, gap, gap)
+            self.screen.blit(self.background, rect, rect) # restores grid lines and any fixed clue
+            cell = self.cells[row][col]
+            if cell.selected or cell.conflict or not cell.is_fixed:
+                cell.draw()
+                self.draw_marks(row, col)
+            rects.append(rect)
+        self.dirty.clear()
+        return rects
+
+    def draw_marks(self, row, col):
+        # pencil marks for an empty cell without a sketch, the candidates come from the incremental grid
+        index = row * self.row_length + col
+        if not self.show_marks or self.model.values[index] != 0 or self.model.sketches[index] != 0:
+            return
+        glyphs = get_mark_glyphs(self.row_length)
+        gap = self.width // self.row_length
+        sub = gap // self.box_length
+        mask = self.candidates[index]
+        while mask:
+            bit = mask & -mask
+            mask ^= bit
+            num = bit.bit_length()
+            text = glyphs[num]
+            x = col * gap + (num - 1) % self.box_length * sub + sub // 2 - text.get_width() // 2
+            y = row * gap + (num - 1) // self.box_length * sub + sub // 2 - text.get_height() // 2
+            self.screen.blit(text, (x, y))
+
+    def toggle_marks(self):
+        self.show_marks = not self.show_marks
+        self.full_redraw = True
+
+    def load_board(self, board):
+        self.model.load(board)  # non-zero cells become fixed, they cannot be changed
+        self.puzzle_loaded()
+
+    def puzzle_loaded(self):
+        # called after the model's values and clues were replaced in bulk
+        self.count_values()
+        key = self.model.snapshot() + bytes(self.model.fixed)
+        if key != self.background_key:
+            self.background = None  # a different puzzle, e.g. not just a reset
+            self.background_key = key
+        self.full_redraw = True
+
+    def select(self, row, col):
+        if self.selected_cell:
+            # only the previously selected cell can still have the flag set
+            old_row, old_col = self.selected_cell
+            self.cells[old_row][old_col].selected = False
+            self.dirty.add(self.selected_cell)
+        self.cells[row][col].selected = True
+        self.selected_cell = (row, col)
+        self.typed = 0
+        self.dirty.add(self.selected_cell)
+
+    def sketch(self, value):
+        if self.selected_cell:
+            row, col = self.selected_cell
+            cell = self.cells[row][col]
+            if not cell.is_fixed and cell.sketched_value != value:
+                self.record(cell.index, cell.value, cell.value, cell.sketched_value, value)
+                cell.set_sketched_value(value)
+                self.dirty.add(self.selected_cell)
+
+    def type_digit(self, digit):
+        # number keys 0-9: on boards above 9x9 a second digit joins the first while the value fits, so 1 then 6
+        # sketches 1 and then 16, and a digit that doesn't fit starts a new value; on 9x9 every key is its own value
+        value = self.typed * 10 + digit
+        if not self.typed or value > self.row_length:
+            value = digit
+        self.typed = value if value * 10 <= self.row_length and value != 0 else 0
+        if value != 0:
+            self.sketch(value)
+
+    def submit_guess(self):
+        self.typed = 0
+        if self.selected_cell:
+            row, col = self.selected_cell
+            if self.cells[row][col].sketched_value != 0:
+                old_value = self.cells[row][col].value
+                self.record(self.cells[row][col].index, old_value, self.cells[row][col].sketched_value,
+                            self.cells[row][col].sketched_value, 0)
+                self.cells[row][col].set_cell_value(self.cells[row][col].sketched_value)
+                self.cells[row][col].sketched_value = 0
+                self.update_counts(row, col, old_value, self.cells[row][col].value)
+                self.dirty.add(self.selected_cell)
+
+    def reset_to_original(self):
+        # bulk copy of the initial snapshot, no per-cell loop
+        self.model.restore(self.initial_values)
+        self.model.fix_givens()
+        self.puzzle_loaded()
+        self.clear_history()  # a reset starts a fresh history, there is nothing to undo back into
+
+    # Move log: every edit is stored as a small delta, so undo and redo touch one cell and its peers
+    # instead of copying boards. Full copies only happen when the game writes a checkpoint (game_save.py).
+
+    def record(self, index, old_value, new_value, old_sketch, new_sketch):
+        if self.position < len(self.moves):
+            del self.moves[self.position:]  # a new edit after undos drops the redo branch
+        self.moves.append((index, old_value, new_value, old_sketch, new_sketch))
+        self.position += 1
+        self.edits += 1
+
+    def clear_history(self):
+        self.moves = []
+        self.position = 0
+        self.edits += 1
+
+    def undo(self):
+        if self.position == 0:
+            return False
+        self.position -= 1
+        index, old_value, new_value, old_sketch, new_sketch = self.moves[self.position]
+        self.apply(index, old_value, old_sketch)
+        return True
+
+    def redo(self):
+        if self.position == len(self.moves):
+            return False
+        index, old_value, new_value, old_sketch, new_sketch = self.moves[self.position]
+        self.position += 1
+        self.apply(index, new_value, new_sketch)
+        return True
+
+    def apply(self, index, value, sketch):
+        row, col = divmod(index, self.row_length)
+        old_value = self.model.values[index]
+        self.model.values[index] = value
+        self.model.sketches[index] = sketch
+        self.update_counts(row, col, old_value, value)
+        self.dirty.add((row, col))
+        self.edits += 1
+
+    def count_values(self):
+        # rebuilds the running counts from scratch, only needed when a whole board is loaded
+        n = self.row_length
+        self.filled = 0
+        self.row_counts = [[0] * (n + 1) for _ in range(n)]  # row_counts[row][digit] = how many times digit is in the row
+        self.col_counts = [[0] * (n + 1) for _ in range(n)]
+        self.box_counts = [[0] * (n + 1) for _ in range(n)]
+        self.row_masks = [0] * n  # bit digit - 1 is set while the digit is somewhere in the row
+        self.col_masks = [0] * n
+        self.box_masks = [0] * n
+        values = self.model.values
+        for index, value in enumerate(values):
+            if value != 0:
+                row, col = divmod(index, n)
+                box = self.box_of(row, col)
+                self.filled += 1
+                self.row_counts[row][value] += 1
+                self.col_counts[col][value] += 1
+                self.box_counts[box][value] += 1
+                self.row_masks[row] |= 1 << (value - 1)
+                self.col_masks[col] |= 1 << (value - 1)
+                self.box_masks[box] |= 1 << (value - 1)
+        conflicts = set()
+        for index, value in enumerate(values):
+            if value != 0:
+                row, col = divmod(index, n)
+                if (self.row_counts[row][value] > 1 or self.col_counts[col][value] > 1
+                        or self.box_counts[self.box_of(row, col)][value] > 1):
+                    conflicts.add((row, col))
+        # only cells whose conflict state flipped need their flag and a redraw
+        for row, col in conflicts.symmetric_difference(self.conflicts):
+            self.cells[row][col].conflict = (row, col) in conflicts
+            self.dirty.add((row, col))
+        self.conflicts = conflicts
+        self.rebuild_candidates()
+        self.grader = None  # built by the first hint that needs more than singles
+        self.next_move = None
+
+    def update_counts(self, row, col, old_value, new_value):
+        # keeps the counts and conflicts up to date after one cell changed, only its peers are looked at
+        if old_value == new_value:
+            return
+        self.follow_grader(row * self.row_length + col, old_value, new_value)
+        box = self.box_of(row, col)
+        if old_value != 0:
+            self.filled -= 1
+            self.row_counts[row][old_value] -= 1
+            self.col_counts[col][old_value] -= 1
+            self.box_counts[box][old_value] -= 1
+            bit = 1 << (old_value - 1)
+            if self.row_counts[row][old_value] == 0:
+                self.row_masks[row] &= ~bit
+            if self.col_counts[col][old_value] == 0:
+                self.col_masks[col] &= ~bit
+            if self.box_counts[box][old_value] == 0:
+                self.box_masks[box] &= ~bit
+        if new_value != 0:
+            self.filled += 1
+            self.row_counts[row][new_value] += 1
+            self.col_counts[col][new_value] += 1
+            self.box_counts[box][new_value] += 1
+            self.row_masks[row] |= 1 << (new_value - 1)
+            self.col_masks[col] |= 1 << (new_value - 1)
+            self.box_masks[box] |= 1 << (new_value - 1)
+        self.refresh_conflict(row, col)
+        self.refresh_candidates(row, col)
+        for r, c in self.peers[row][col]:
+            if self.cells[r][c].value in (old_value, new_value):
+                self.refresh_conflict(r, c)
+            self.refresh_candidates(r, c)
+
+    def refresh_conflict(self, row, col):
+        cell = self.cells[row][col]
+        value = cell.value
+        conflict = value != 0 and (self.row_counts[row][value] > 1 or self.col_counts[col][value] > 1
+                                   or self.box_counts[self.box_of(row, col)][value] > 1)
+        if conflict:
+            self.conflicts.add((row, col))
+        else:
+            self.conflicts.discard((row, col))
+        if conflict != cell.conflict:
+            cell.conflict = conflict
+            self.dirty.add((row, col))
+
+    # Candidate grid: one bitmask per cell of the digits its row, column and box still allow (0 once filled).
+    # Alongside it, how many cells of each unit (rows, then columns, then boxes) still allow each digit,
+    # so naked singles (one candidate) and hidden singles (a digit with one place in a unit) are known without a scan.
+
+    def rebuild_candidates(self):
+        n = self.row_length
+        self.candidates = [0] * (n * n)
+        self.place_counts = [[0] * (n + 1) for _ in range(3 * n)]  # place_counts[unit][digit]
+        self.naked_singles = set()  # flat indices of empty cells with exactly one candidate
+        full = (1 << n) - 1
+        for index, value in enumerate(self.model.values):
+            if value != 0:
+                continue
+            row, col = divmod(index, n)
+            box = self.box_of(row, col)
+            mask = full & ~(self.row_masks[row] | self.col_masks[col] | self.box_masks[box])
+            self.candidates[index] = mask
+            if mask and mask & (mask - 1) == 0:
+                self.naked_singles.add(index)
+            while mask:
+                bit = mask & -mask
+                mask ^= bit
+                digit = bit.bit_length()
+                self.place_counts[row][digit] += 1
+                self.place_counts[n + col][digit] += 1
+                self.place_counts[2 * n + box][digit] += 1
+        # (unit, digit) pairs with exactly one place left
+        self.hidden_singles = {(unit, digit) for unit, counts in enumerate(self.place_counts)
+                               for digit in range(1, n + 1) if counts[digit] == 1}
+        if self.show_marks:
+            self.full_redraw = True
+
+    def refresh_candidates(self, row, col):
+        n = self.row_length
+        index = row * n + col
+        box = self.box_of(row, col)
+        mask = 0
+        if self.model.values[index] == 0:
+            mask = ((1 << n) - 1) & ~(self.row_masks[row] | self.col_masks[col] | self.box_masks[box])
+        old = self.candidates[index]
+        if mask == old:
+            return
+        self.candidates[index] = mask
+        changed = old ^ mask
+        while changed:
+            bit = changed & -changed
+            changed ^= bit
+            digit = bit.bit_length()
+            step = 1 if mask & bit else -1
+            for unit in (row, n + col, 2 * n + box):
+                count = self.place_counts[unit][digit] + step
+                self.place_counts[unit][digit] = count
+                if count == 1:
+                    self.hidden_singles.add((unit, digit))
+                else:
+                    self.hidden_singles.discard((unit, digit))
+        if mask and mask & (mask - 1) == 0:
+            self.naked_singles.add(index)
+        else:
+            self.naked_singles.discard(index)
+        if self.show_marks:
+            self.dirty.add((row, col))
+
+    def follow_grader(self, index, old_value, new_value):
+        # the hint grader takes a new value in place as long as it is one the grader still allows (and the solution's,
+        # once the grader knew it), anything else (a value undone or overwritten, a wrong digit) drops it
+        self.next_move = None
+        grader = self.grader
+        if grader is None:
+            return
+        if (old_value != 0 or not grader.candidates[index] & 1 << (new_value - 1)
+                or grader.solution is not None and grader.solution[index] != new_value):
+            self.grader = None
+        else:
+            grader.place(index, new_value)
+
+    def hint(self):
+        # the cheapest next move as (row, col, value, technique), None if the board has a conflict or nothing follows
+        # singles come straight from the incremental sets, harder positions from a grader kept alongside the board:
+        # it keeps its eliminations between hints and takes every value entered, so a hint carries on from the last
+        # one rather than grading the whole board again, and the move is kept until the board changes
+        if self.conflicts:
+            return None
+        n = self.row_length
+        for unit, digit in self.hidden_singles:
+            bit = 1 << (digit - 1)
+            for index in layout(n)[2][unit]:
+                if self.candidates[index] & bit:
+                    return index // n, index % n, digit, "hidden single"
+        for index in self.naked_singles:
+            return index // n, index % n, self.candidates[index].bit_length(), "naked single"
+        if self.next_move is None:
+            if self.grader is None:
+                self.grader = LogicGrader(self.model.to_lists())
+            self.next_move = self.grader.next_move() or ()
+        if not self.next_move:
+            return None
+        index, value, technique = self.next_move
+        return index // n, index % n, value, technique
+
+    def show_hint(self):
+        # selects the hinted cell and pencils the value in, Enter then submits it like any other guess
+        move = self.hint()
+        if move is not None:
+            row, col, value, technique = move
+            self.select(row, col)
+            self.sketch(value)
+        return move
+
+    def box_of(self, row, col):
+        return row // self.box_length * self.box_length + col // self.box_length
+
+    def check_is_full(self):
+        return self.filled == self.row_length * self.row_length
+
+    def check_is_correct(self):
+        # a full board with no repeated digit in any row, column or box holds 1-n in each of them
+        return self.check_is_full() and not self.conflicts
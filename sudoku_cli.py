@@ -0,0 +1,181 @@
+import argparse, random, sys
+from colors_and_values import difficulty_settings, difficulty_scores
+from sudoku_generator import SudokuGenerator, generate_many
+import puzzle_symmetry, sudoku_grader, sudoku_solver
+
+# Headless command line tools, no pygame involved:
+#   python -m sudoku_cli generate --count 100 --difficulty hard > puzzles.txt
+#   python -m sudoku_cli solve < puzzles.txt
+#   python -m sudoku_cli validate < boards.txt
+#   python -m sudoku_cli grade < puzzles.txt
+#   python -m sudoku_cli dedup --index catalogue.idx < new_puzzles.txt >> catalogue.txt
+# Boards are one per line as 81 characters, row by row, with '.' or '0' for an empty cell.
+
+def parse_board(line):
+    line = line.strip()
+    if len(line) != 81 or any(ch not in ".0123456789" for ch in line):
+        raise ValueError(f"expected 81 characters of 1-9, '.' or '0', got {line!r}")
+    values = [0 if ch == "." else int(ch) for ch in line]
+    return [values[i * 9:(i + 1) * 9] for i in range(9)]
+
+def score_band(text):
+    # argparse type for --score: "LOW-HIGH" with 0 <= LOW <= HIGH, returned as (low, high)
+    low, dash, high = text.partition("-")
+    if not dash or not low.isdigit() or not high.isdigit() or int(low) > int(high):
+        raise argparse.ArgumentTypeError(f"expected LOW-HIGH with LOW <= HIGH, got {text!r}")
+    return int(low), int(high)
+
+def format_board(board):
+    return "".join(str(num) if num != 0 else "." for row in board for num in row)
+
+def read_boards(stream):
+    # yields (line number, board or None), blank lines and '#' comments are skipped
+    for number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            yield number, parse_board(line)
+        except ValueError as error:
+            print(f"line {number}: {error}", file=sys.stderr)
+            yield number, None
+
+def board_status(board):
+    # solved / invalid for a full board, unique / multiple / unsolvable for a puzzle
+    if all(num != 0 for row in board for num in row):
+        generator = SudokuGenerator(0)
+        generator.board = board
+        return "solved" if generator.is_board_complete() else "invalid"
+    return {0: "unsolvable", 1: "unique"}.get(sudoku_solver.count_solutions(board, 2), "multiple")
+
+def generate(args, out):
+    removed = args.removed if args.removed is not None else difficulty_settings[args.difficulty]
+    band = args.score
+    if band is None and args.graded:
+        band = difficulty_scores[args.difficulty]
+    # with --variants K every generated grid is relabelled, permuted and transposed into K puzzles
+    per_grid = max(1, args.variants)
+    rng = random.Random(args.seed)
+    written = 0
+    try:
+        for item in generate_many(removed, -(-args.count // per_grid), workers=args.workers, seed=args.seed,
+                                  unique=not args.ambiguous, solutions=args.solutions, band=band):
+            puzzle, solution = item if args.solutions else (item, None)
+            pairs = list(puzzle_symmetry.variants(puzzle, solution, per_grid - 1, rng))
+            if band is not None:
+                # a variant grades like its original, checked anyway because --graded and --score promise the band
+                pairs = [pair for pair in pairs if band[0] <= sudoku_grader.grade(pair[0])[0] <= band[1]]
+            for puzzle, solution in [(puzzle, solution)] + pairs:
+                if written == args.count:
+                    break
+                if args.solutions:
+                    out.write(f"{format_board(puzzle)} {format_board(solution)}\n")
+                else:
+                    out.write(format_board(puzzle) + "\n")
+                written += 1
+    except ValueError as error:  # the score band was never reached
+        print(error, file=sys.stderr)
+        return 1
+    return 0
+
+def solve(args, inp, out):
+    failed = 0
+    for number, board in read_boards(inp):
+        solution = sudoku_solver.solve(board) if board is not None else None
+        out.write((format_board(solution) if solution else "none") + "\n")
+        failed += board is None
+    return 1 if failed else 0
+
+def validate(args, inp, out):
+    failed = 0
+    for number, board in read_boards(inp):
+        out.write((board_status(board) if board is not None else "error") + "\n")
+        failed += board is None
+    return 1 if failed else 0
+
+def grade(args, inp, out):
+    # the logic score, then every technique used with how often it was needed
+    failed = 0
+    for number, board in read_boards(inp):
+        try:
+            score, techniques = sudoku_grader.grade(board) if board is not None else (None, None)
+        except ValueError as error:
+            print(f"line {number}: {error}", file=sys.stderr)
+            score = None
+        if score is None:
+            out.write("error\n")
+            failed += 1
+            continue
+        out.write(" ".join([str(score)] + [f"{name.replace(' ', '-')}:{count}" for name, count in techniques.items()]) + "\n")
+    return 1 if failed else 0
+
+def canon(args, inp, out):
+    failed = 0
+    for number, board in read_boards(inp):
+        try:
+            form = puzzle_symmetry.canonical_form(board) if board is not None else None
+        except ValueError as error:  # a digit repeats in a row or column
+            print(f"line {number}: {error}", file=sys.stderr)
+            form = None
+        if form is None:
+            out.write("error\n")
+            failed += 1
+        else:
+            out.write(format_board(puzzle_symmetry.unflatten(form, len(board))) + "\n")
+    return 1 if failed else 0
+
+def dedup(args, inp, out):
+    # passes through only puzzles that are neither in the index nor isomorphic to one in it, and records them
+    failed = 0
+    with puzzle_symmetry.CanonicalIndex(args.index) as index:
+        for number, board in read_boards(inp):
+            if board is None:
+                failed += 1
+                continue
+            try:
+                if index.add(board):
+                    out.write(format_board(board) + "\n")
+            except ValueError as error:  # a digit repeats in a row or column
+                print(f"line {number}: {error}", file=sys.stderr)
+                failed += 1
+    return 1 if failed else 0
+
+def main(argv=None, inp=sys.stdin, out=sys.stdout):
+    parser = argparse.ArgumentParser(prog="python -m sudoku_cli", description="Generate, solve and validate sudoku puzzles.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate_parser = commands.add_parser("generate", help="write puzzles to stdout, one per line")
+    generate_parser.add_argument("--count", type=int, default=1)
+    generate_parser.add_argument("--difficulty", choices=sorted(difficulty_settings), default="medium")
+    generate_parser.add_argument("--removed", type=int, default=None, help="cells to blank, overrides --difficulty")
+    generate_parser.add_argument("--seed", default=None)
+    generate_parser.add_argument("--workers", type=int, default=1)
+    generate_parser.add_argument("--ambiguous", action="store_true", help="skip the unique-solution check when removing cells")
+    generate_parser.add_argument("--solutions", action="store_true", help="append the solution after each puzzle")
+    generate_parser.add_argument("--graded", action="store_true", help="only keep puzzles whose logic score fits --difficulty")
+    generate_parser.add_argument("--score", metavar="LOW-HIGH", type=score_band, default=None,
+                                 help="only keep puzzles with a logic score in this range")
+    generate_parser.add_argument("--variants", type=int, default=1, help="puzzles derived by symmetry from every generated grid")
+
+    commands.add_parser("solve", help="solve puzzles from stdin, 'none' when there is no solution")
+    commands.add_parser("validate", help="print solved/invalid for full boards, unique/multiple/unsolvable for puzzles")
+    commands.add_parser("grade", help="print the logic score and the techniques needed for puzzles from stdin")
+    commands.add_parser("canon", help="print the canonical form of every puzzle, the same for all its symmetric copies")
+    dedup_parser = commands.add_parser("dedup", help="print only puzzles not already in the index (up to symmetry) and add them")
+    dedup_parser.add_argument("--index", required=True, metavar="PATH", help="dedup index file, created if missing")
+
+    args = parser.parse_args(argv)
+    if args.command == "generate":
+        return generate(args, out)
+    if args.command == "solve":
+        return solve(args, inp, out)
+    if args.command == "grade":
+        return grade(args, inp, out)
+    if args.command == "canon":
+        return canon(args, inp, out)
+    if args.command == "dedup":
+        return dedup(args, inp, out)
+    return validate(args, inp, out)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,21 @@
-import math, random
+import math, os, random
+from board_model import BoardModel
+import instrumentation
+from functools import lru_cache
+from sudoku_grader import grade
+import sudoku_solver
+
+UNIQUE_NODES = 5 # search nodes per row of the board allowed for each uniqueness check beyond 9x9
+
+@lru_cache(maxsize=None)
+def cell_boxes(row_length):
+    # shared by every generator of this size, never modified
+    box_length = int(math.sqrt(row_length))
+    return tuple((i // box_length) * box_length + j // box_length for i in range(row_length) for j in range(row_length))
 
 class SudokuGenerator:
 
-    def __init__(self, removed_cells, row_length = 9):
+    def __init__(self, removed_cells, row_length = 9, rng = None, model = None):
         #just initialising the variables 
         self.box_length = int(math.sqrt(row_length))
         self.row_length = row_length
@@ -10,7 +23,28 @@ class SudokuGenerator:
         if int(math.sqrt(row_length)) ** 2 != row_length:
             raise ValueError("Row length must be a perfect square (e.g., 9 for a 9x9 Sudoku board)")
         self.removed_cells = int(removed_cells)
-        self.board = [[0 for _ in range(self.row_length)] for _ in range(self.row_length)] #made the board an array of 0s 
+        self.rng = rng if rng is not None else random # any random.Random instance, so batches can be seeded per puzzle
+        # the board lives in a flat BoardModel (index = row * row_length + col), pass one in to generate straight into it
+        self.model = model if model is not None else BoardModel(self.row_length)
+        self.values = self.model.values
+        # bitmasks of the digits used in every row, column and box (bit num - 1 is set when num is placed)
+        self.full_mask = (1 << self.row_length) - 1
+        self.row_masks = [0] * self.row_length
+        self.col_masks = [0] * self.row_length
+        self.box_masks = [0] * self.row_length
+        # (unit, num) -> copies of num in that unit beyond the first, only boards with repeated digits have any
+        # units are numbered rows 0..n-1, columns n..2n-1, boxes 2n..3n-1
+        self.extras = {}
+        self.cell_boxes = cell_boxes(self.row_length) #box of every flat index
+
+    @property
+    def board(self):
+        return self.model.to_lists() #a list of lists copy, write through set_value or assign a whole board
+
+    @board.setter
+    def board(self, board):
+        self.values[:] = bytes(num for row in board for num in row)
+        self.rebuild_masks()
 
     def get_board(self):
         return self.board #literally just the same thing that was set to self.board in line 11
@@ -19,36 +53,104 @@ class SudokuGenerator:
         for row in self.board:
             print(" ".join(str(num) if num != 0 else '-' for num in row)) #this is just a print function to print the board in a readable format
 
+    def box_index(self, row, col):
+        return (row // self.box_length) * self.box_length + col // self.box_length #boxes are numbered left to right, top to bottom
+
+    def place(self, row, col, num):
+        # writes num into the board and marks it in the row, column and box masks
+        bit = 1 << (num - 1)
+        cell = row * self.row_length + col
+        box = self.cell_boxes[cell]
+        self.values[cell] = num
+        if (self.row_masks[row] | self.col_masks[col] | self.box_masks[box]) & bit:
+            self.count_copies(row, col, box, num, 1)
+            return
+        self.row_masks[row] |= bit
+        self.col_masks[col] |= bit
+        self.box_masks[box] |= bit
+
+    def clear(self, row, col):
+        # empties the cell and unmarks its digit from the masks, except in units that still hold another copy
+        cell = row * self.row_length + col
+        num = self.values[cell]
+        if num != 0:
+            self.values[cell] = 0
+            if self.extras:
+                self.count_copies(row, col, self.cell_boxes[cell], num, -1)
+                return
+            bit = ~(1 << (num - 1))
+            self.row_masks[row] &= bit
+            self.col_masks[col] &= bit
+            self.box_masks[self.cell_boxes[cell]] &= bit
+
+    def count_copies(self, row, col, box, num, change):
+        # slow path of place (change 1) and clear (change -1) for digits that repeat in a unit
+        n = self.row_length
+        bit = 1 << (num - 1)
+        for masks, index, unit in ((self.row_masks, row, row), (self.col_masks, col, n + col), (self.box_masks, box, 2 * n + box)):
+            key = (unit, num)
+            if change > 0:
+                if masks[index] & bit:
+                    self.extras[key] = self.extras.get(key, 0) + 1
+                else:
+                    masks[index] |= bit
+            elif key in self.extras:
+                self.extras[key] -= 1
+                if not self.extras[key]:
+                    del self.extras[key]
+            else:
+                masks[index] &= ~bit
+
+    def rebuild_masks(self):
+        # recomputes the masks from the values, needed if the model was edited directly
+        self.row_masks = [0] * self.row_length
+        self.col_masks = [0] * self.row_length
+        self.box_masks = [0] * self.row_length
+        self.extras = {}
+        for row in range(self.row_length):
+            for col in range(self.row_length):
+                num = self.values[row * self.row_length + col]
+                if num != 0:
+                    self.place(row, col, num)
+
+    def candidate_mask(self, row, col):
+        # bitmask of every digit that can go in (row, col) without clashing with another cell
+        cell = row * self.row_length + col
+        box = self.cell_boxes[cell]
+        used = self.row_masks[row] | self.col_masks[col] | self.box_masks[box]
+        current = self.values[cell]
+        if current != 0:
+            #the cell's own value doesn't count against it, another copy of it in the same unit does
+            n = self.row_length
+            extras = self.extras
+            if not extras or not ((row, current) in extras or (n + col, current) in extras or (2 * n + box, current) in extras):
+                used &= ~(1 << (current - 1))
+            else:
+                own = ~(1 << (current - 1))
+                used = ((self.row_masks[row] & own if (row, current) not in extras else self.row_masks[row])
+                        | (self.col_masks[col] & own if (n + col, current) not in extras else self.col_masks[col])
+                        | (self.box_masks[box] & own if (2 * n + box, current) not in extras else self.box_masks[box]))
+        return self.full_mask & ~used
 
     def valid_in_row(self, row, num):
-        return num not in self.board[row] #checks if the number is in the row or not
+        return not self.row_masks[row] >> (num - 1) & 1 #checks if the number is in the row or not
 
     def valid_in_col(self, col, num):
-        return all(self.board[row][col] != num for row in range(self.row_length)) #checks if the number is in the column or not
+        return not self.col_masks[col] >> (num - 1) & 1 #checks if the number is in the column or not
 
     def valid_in_box(self, row_start, col_start, num):
-        for i in range(row_start, row_start + self.box_length): 
-            for j in range(col_start, col_start + self.box_length): #checks if the number is in the box or not
-                if self.board[i][j] == num: #if the number is in the box, return false
-                    return False
-        return True
+        return not self.box_masks[self.box_index(row_start, col_start)] >> (num - 1) & 1 #checks if the number is in the box or not
 
     def is_valid(self, row, col, num):
-        # Temporarily clear current cell value for accurate validation
-        current = self.board[row][col]
-        self.board[row][col] = 0
-        valid = (self.valid_in_row(row, num) and
-                 self.valid_in_col(col, num) and
-                 self.valid_in_box(row - row % self.box_length, col - col % self.box_length, num))
-        self.board[row][col] = current  # Restore value
-        return valid #checks if the number is valid or not by checking if it is in the row, column and box
+        # the current cell is ignored, same as temporarily clearing it
+        return self.candidate_mask(row, col) >> (num - 1) & 1 == 1 #checks if the number is valid or not by checking if it is in the row, column and box
 
     def fill_box(self, row_start, col_start):
         nums = list(range(1, self.row_length + 1)) #creates a list of numbers from 1 to 9
-        random.shuffle(nums)    #shuffles the numbers randomly
+        self.rng.shuffle(nums)    #shuffles the numbers randomly
         for i in range(row_start, row_start + self.box_length): #fills the box with the numbers
             for j in range(col_start, col_start + self.box_length): 
-                self.board[i][j] = nums.pop() #pops the number from the list and fills the box with it
+                self.place(i, j, nums.pop()) #pops the number from the list and fills the box with it
 
     def fill_diagonal(self):
         for i in range(0, self.row_length, self.box_length):    
@@ -72,48 +174,292 @@ class SudokuGenerator:
                 col = 0
                 if row >= self.row_length:
                     return True
-        for num in range(1, self.row_length + 1): 
-            if self.is_valid(row, col, num):
-                self.board[row][col] = num
-                if self.fill_remaining(row, col + 1):
-                    return True
-                self.board[row][col] = 0
+        candidates = self.candidate_mask(row, col)
+        while candidates:
+            bit = candidates & -candidates #lowest digit first, same order as trying 1 to 9
+            candidates ^= bit
+            self.place(row, col, bit.bit_length())
+            if self.fill_remaining(row, col + 1):
+                return True
+            self.clear(row, col)
         return False
 
     def fill_values(self):
+        if self.row_length != 9:
+            # fill_remaining recurses once per cell in a fixed order: too slow and too deep beyond 9x9,
+            # and its diagonal-first order can dead-end on 4x4
+            self.fill_grid()
+            return
         self.fill_diagonal()
         self.fill_remaining(0, 0)
 
-    def remove_cells(self): 
+    def reset_board(self):
+        self.values[:] = bytes(len(self.values))
+        self.rebuild_masks()
+
+    def random_digit(self, mask):
+        # picks one of the set bits of mask uniformly at random, returns its bit
+        skip = self.rng.randrange(mask.bit_count())
+        for _ in range(skip):
+            mask &= mask - 1
+        return mask & -mask
+
+    def fill_grid(self, max_backtracks=None):
+        # fills the diagonal boxes, then the rest with search_fill, starting over if a run gets stuck
+        if max_backtracks is None:
+            max_backtracks = self.row_length * self.row_length
+        while True:
+            self.reset_board()
+            self.fill_diagonal()
+            if self.search_fill(max_backtracks):
+                return True
+
+    def search_fill(self, max_backtracks):
+        # non-recursive search: always fill the empty cell with the fewest candidates, trying its digits in random order
+        # gives up (returns False) after max_backtracks dead ends so fill_grid can restart from a new random start
+        n = self.row_length
+        row_masks, col_masks, box_masks, cell_boxes = self.row_masks, self.col_masks, self.box_masks, self.cell_boxes
+        full = self.full_mask
+        empties = [(cell, cell // n, cell % n, cell_boxes[cell]) for cell in range(n * n) if self.values[cell] == 0]
+        stack = []  # (empties entry, digits not tried yet) for every cell filled by the search
+        backtracks = 0
+        while empties:
+            best = -1
+            best_mask = 0
+            best_count = n + 1
+            for index, (cell, row, col, box) in enumerate(empties):
+                mask = full & ~(row_masks[row] | col_masks[col] | box_masks[box])
+                count = mask.bit_count()
+                if count < best_count:
+                    best, best_mask, best_count = index, mask, count
+                    if count <= 1:
+                        break
+            if best_count > 0:
+                entry = empties[best]
+                empties[best] = empties[-1]
+                empties.pop()
+                bit = self.random_digit(best_mask)
+                self.place(entry[1], entry[2], bit.bit_length())
+                stack.append((entry, best_mask ^ bit))
+                continue
+            # dead end: undo cells until one still has an untried digit
+            backtracks += 1
+            if instrumentation.enabled:
+                instrumentation.count("generator.search_fill.backtracks")
+            if backtracks > max_backtracks:
+                if instrumentation.enabled:
+                    instrumentation.count("generator.search_fill.restarts")
+                return False
+            while stack:
+                entry, remaining = stack.pop()
+                self.clear(entry[1], entry[2])
+                if remaining:
+                    bit = self.random_digit(remaining)
+                    self.place(entry[1], entry[2], bit.bit_length())
+                    stack.append((entry, remaining ^ bit))
+                    break
+                empties.append(entry)
+            else:
+                return False
+        return True
+
+    def remove_cells(self, unique=False): 
+        if unique:
+            return self.remove_cells_unique()
         cells_removed = 0  
+        attempts = 0
         while cells_removed < self.removed_cells:
-            i = random.randint(0, self.row_length - 1) 
-            j = random.randint(0, self.row_length - 1)
-            if self.board[i][j] != 0:
-                self.board[i][j] = 0
+            attempts += 1
+            i = self.rng.randint(0, self.row_length - 1) 
+            j = self.rng.randint(0, self.row_length - 1)
+            if self.values[i * self.row_length + j] != 0:
+                self.clear(i, j)
                 cells_removed += 1 
-    
+        if instrumentation.enabled:
+            instrumentation.count("generator.remove_cells.empty_picks", attempts - cells_removed) #picked a cell that was already empty
+        return cells_removed
+
+    def remove_cells_unique(self):
+        # tries every filled cell once in random order and only keeps a removal if the puzzle still has one solution
+        cells = [(i, j) for i in range(self.row_length) for j in range(self.row_length) if self.values[i * self.row_length + j] != 0]
+        self.rng.shuffle(cells)
+        cells_removed = 0
+        for i, j in cells:
+            if cells_removed >= self.removed_cells:
+                break
+            cells_removed += self.remove_if_unique(i, j)
+        return cells_removed #can be less than removed_cells if no more cells can go without losing uniqueness
+
+    def remove_if_unique(self, i, j):
+        num = self.values[i * self.row_length + j]
+        self.clear(i, j)
+        # num is the known solution here, so a second solution exists only if another digit also works
+        # beyond 9x9 proving there is none can take minutes, so the search is capped and keeps the cell when it gives up
+        max_nodes = None if self.row_length == 9 else UNIQUE_NODES * self.row_length
+        if self.candidate_mask(i, j) == 1 << (num - 1) or self.count_solutions(1, exclude=(i, j, num), max_nodes=max_nodes) == 0:
+            return True
+        self.place(i, j, num)
+        return False
+
+    def remove_cells_graded(self, low, high):
+        # removes removed_cells cells like remove_cells_unique, then keeps removing while the puzzle grades below low
+        # returns the logic score, or None if it ended up outside [low, high]
+        cells = [(i, j) for i in range(self.row_length) for j in range(self.row_length) if self.values[i * self.row_length + j] != 0]
+        self.rng.shuffle(cells)
+        cells_removed = 0
+        score = None
+        for i, j in cells:
+            if not self.remove_if_unique(i, j):
+                continue
+            cells_removed += 1
+            if cells_removed >= self.removed_cells:
+                score = grade(self.get_board())[0]
+                if score >= low:
+                    break
+        if score is None:
+            score = grade(self.get_board())[0]
+        return score if low <= score <= high else None
+
+    def generate_graded(self, low, high, attempts=200):
+        # fills and blanks fresh grids until the puzzle's logic score lands in [low, high]
+        # returns the score, after attempts misses the last puzzle is kept and None returned
+        for _ in range(attempts):
+            self.reset_board()
+            self.fill_values()
+            score = self.remove_cells_graded(low, high)
+            if score is not None:
+                return score
+        return None
+
+    def count_solutions(self, limit=2, exclude=None, max_nodes=None):
+        # counts completions of the current board, stopping as soon as limit is reached
+        # exclude=(row, col, num) bans num from that cell, used to look for a solution other than a known one
+        # max_nodes caps the search, running out returns limit: "at least limit" is the safe answer for a uniqueness check
+        if self.extras:
+            return 0  # a digit repeats in some row, column or box, so the givens already contradict each other
+        banned = {}
+        if exclude is not None:
+            row, col, num = exclude
+            banned[(row, col)] = 1 << (num - 1)
+        n = self.row_length
+        empties = [(i, j, self.box_index(i, j), i * n + j) for i in range(n) for j in range(n) if self.values[i * n + j] == 0]
+        return self.count_from(empties, limit, banned, [max_nodes] if max_nodes is not None else None)
+
+    def count_from(self, empties, limit, banned, budget=None):
+        if not empties:
+            return 1
+        if budget is not None:
+            budget[0] -= 1 # nodes left, shared by the whole search
+            if budget[0] < 0:
+                return limit
+        row_masks, col_masks, box_masks = self.row_masks, self.col_masks, self.box_masks
+        full = self.full_mask
+        # most constrained cell first keeps the search tree small
+        best = -1
+        best_mask = 0
+        best_count = self.row_length + 1
+        for index, (i, j, k, cell) in enumerate(empties):
+            mask = full & ~(row_masks[i] | col_masks[j] | box_masks[k])
+            if banned:
+                mask &= ~banned.get((i, j), 0)
+            count = mask.bit_count()
+            if count < best_count:
+                best, best_mask, best_count = index, mask, count
+                if count <= 1:
+                    break
+        if best_count == 0:
+            return 0
+        i, j, k, cell = empties[best]
+        values = self.values
+        rest = empties[:best] + empties[best + 1:]
+        found = 0
+        while best_mask:
+            bit = best_mask & -best_mask
+            best_mask ^= bit
+            values[cell] = bit.bit_length()
+            row_masks[i] |= bit
+            col_masks[j] |= bit
+            box_masks[k] |= bit
+            found += self.count_from(rest, limit - found, banned, budget)
+            values[cell] = 0
+            row_masks[i] ^= bit
+            col_masks[j] ^= bit
+            box_masks[k] ^= bit
+            if found >= limit:
+                break
+        return found
+
     def is_board_complete(self):
+        # a full board is valid exactly when every row, column and box holds all the digits
+        row_masks = [0] * self.row_length
+        col_masks = [0] * self.row_length
+        box_masks = [0] * self.row_length
         for row in range(self.row_length):
             for col in range(self.row_length):
-                if self.board[row][col] == 0 or not self.is_valid(row, col, self.board[row][col]):
+                num = self.values[row * self.row_length + col]
+                if num == 0:
                     return False
-        return True
+                bit = 1 << (num - 1)
+                row_masks[row] |= bit
+                col_masks[col] |= bit
+                box_masks[self.box_index(row, col)] |= bit
+        return all(mask == self.full_mask for mask in row_masks + col_masks + box_masks)
     
     def set_value(self, row, col, value):
-        if self.board[row][col] == 0 and self.is_valid(row, col, value):
-            self.board[row][col] = value
+        if self.values[row * self.row_length + col] == 0 and self.is_valid(row, col, value):
+            self.place(row, col, value)
             return True
         return False
     
-def generate_sudoku(removed):
+def generate_sudoku(removed, unique=False):
     sudoku = SudokuGenerator(removed)
     sudoku.fill_values()
     board = sudoku.get_board()
-    sudoku.remove_cells()
+    sudoku.remove_cells(unique)
     board = sudoku.get_board()
     return board
 
+def generate_chunk(removed, seed, start, stop, unique=False, solutions=False, band=None):
+    # puzzle i always comes from its own generator seeded with (seed, i), so the output does not depend on how work is split
+    # band=(low, high) generates unique puzzles whose logic score falls in that range, removed is then where grading starts
+    boards = []
+    for index in range(start, stop):
+        sudoku = SudokuGenerator(removed, rng=random.Random(f"{seed}:{index}"))
+        if band is not None:
+            if sudoku.generate_graded(*band) is None:
+                raise ValueError(f"no puzzle with a logic score in {band[0]}-{band[1]} found, the band may be out of reach")
+            solution = sudoku_solver.solve(sudoku.get_board()) if solutions else None
+        else:
+            sudoku.fill_values()
+            solution = [row[:] for row in sudoku.get_board()]
+            sudoku.remove_cells(unique)
+        boards.append((sudoku.get_board(), solution) if solutions else sudoku.get_board())
+    return boards
+
+def generate_many(removed, count, workers=None, seed=None, unique=False, chunk_size=64, solutions=False, band=None):
+    # yields count puzzles in order, generated in chunks across a process pool
+    # the same seed gives the same puzzles for any number of workers
+    # with solutions=True every item is a (puzzle, solution) pair instead of just the puzzle
+    if seed is None:
+        seed = random.randrange(2 ** 63)
+    workers = workers or os.cpu_count() or 1
+    chunks = [(start, min(start + chunk_size, count)) for start in range(0, count, chunk_size)]
+    if workers == 1:
+        for start, stop in chunks:
+            yield from generate_chunk(removed, seed, start, stop, unique, solutions, band)
+        return
+    from concurrent.futures import ProcessPoolExecutor # only batch callers pay for importing it
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # only a couple of chunks per worker are in flight, so memory stays bounded for huge counts
+        pending = []
+        next_chunk = 0
+        while pending or next_chunk < len(chunks):
+            while next_chunk < len(chunks) and len(pending) < workers * 2:
+                start, stop = chunks[next_chunk]
+                pending.append(pool.submit(generate_chunk, removed, seed, start, stop, unique, solutions, band))
+                next_chunk += 1
+            yield from pending.pop(0).result()
+
 # def generate_sudoku_and_solutions(removed):
 #     sudoku = SudokuGenerator(removed)
 #     sudoku.fill_values()
@@ -0,0 +1,283 @@
+import math
+from functools import lru_cache
+import sudoku_solver
+
+# Grades a puzzle by solving it the way a person would, trying the cheapest technique that makes progress first.
+#   score, techniques = grade(board)    board is a list of lists with 0 for empty cells
+# techniques maps each technique used to how often it was applied, score adds up their costs.
+# Candidates are kept as one bitmask per cell (bit num - 1 set while num is still possible), like the generator's masks.
+# Each step finds everything its technique allows on the same candidates before applying any of it, and a guess fills
+# every tied cell, so no step depends on cell order and a relabelled, rotated or reflected puzzle grades the same.
+
+# cost of one application, techniques are tried in this order
+TECHNIQUES = {
+    "hidden single": 1,
+    "naked single": 2,
+    "pointing": 8,
+    "claiming": 8,
+    "naked pair": 12,
+    "hidden pair": 16,
+    "x-wing": 30,
+    "guess": 80,  # nothing above works, per cell filled from the solution
+}
+
+@lru_cache(maxsize=None)
+def layout(row_length):
+    # flat cell indices of every row, column and box, each cell's peers,
+    # and every line/box intersection as (cells in both, rest of the line, rest of the box)
+    n = row_length
+    box = math.isqrt(n)
+    rows = tuple(tuple(r * n + c for c in range(n)) for r in range(n))
+    cols = tuple(tuple(r * n + c for r in range(n)) for c in range(n))
+    boxes = tuple(tuple((top + i) * n + left + j for i in range(box) for j in range(box))
+                  for top in range(0, n, box) for left in range(0, n, box))
+    peers = tuple(tuple(sorted(set(rows[cell // n] + cols[cell % n] + boxes[cell // n // box * box + cell % n // box]) - {cell}))
+                  for cell in range(n * n))
+    intersections = []
+    for box_cells in boxes:
+        for line in rows + cols:
+            segment = [cell for cell in line if cell in box_cells]
+            if segment:
+                intersections.append((tuple(segment), tuple(cell for cell in line if cell not in segment),
+                                      tuple(cell for cell in box_cells if cell not in segment)))
+    return rows, cols, rows + cols + boxes, peers, tuple(intersections)
+
+class LogicGrader:
+
+    def __init__(self, board):
+        n = len(board)
+        self.board = board
+        self.rows, self.cols, self.units, self.peers, self.intersections = layout(n)
+        self.values = [num for row in board for num in row]
+        self.digits = [1 << d for d in range(n)]
+        self.solution = None  # only looked up once the techniques run out
+        self.broken = False  # set when some empty cell is left with no candidates
+        full = (1 << n) - 1
+        # one mask of the givens per unit rather than a walk over every cell's peers
+        used = [0] * (n * n)
+        for unit in self.units:
+            seen = 0
+            for cell in unit:
+                if self.values[cell]:
+                    bit = 1 << (self.values[cell] - 1)
+                    self.broken |= bool(seen & bit)  # a given repeats in its row, column or box
+                    seen |= bit
+            for cell in unit:
+                used[cell] |= seen
+        self.candidates = [0] * (n * n)
+        for cell, num in enumerate(self.values):
+            if num == 0:
+                self.candidates[cell] = full & ~used[cell]
+                self.broken |= self.candidates[cell] == 0
+        self.steps = [("hidden single", self.hidden_singles), ("naked single", self.naked_singles),
+                      ("pointing", self.pointing), ("claiming", self.claiming), ("naked pair", self.naked_pairs),
+                      ("hidden pair", self.hidden_pairs), ("x-wing", self.x_wings), ("guess", self.guess)]
+
+    def place(self, cell, num):
+        self.values[cell] = num
+        self.candidates[cell] = 0
+        bit = 1 << (num - 1)
+        candidates = self.candidates
+        for peer in self.peers[cell]:
+            if candidates[peer] & bit:
+                candidates[peer] ^= bit
+                if candidates[peer] == 0:
+                    self.broken = True
+
+    def fill(self, found):
+        # places every cell found in one round, found maps cell -> bit of its digit; a cell that got two digits
+        # or lost its digit to a peer placed in the same round breaks the board
+        for cell, bit in found.items():
+            if bit & (bit - 1) or not self.candidates[cell] & bit:
+                self.broken = True
+            else:
+                self.place(cell, bit.bit_length())
+        return len(found)
+
+    def remove(self, removals, cells, mask, keep=()):
+        # records mask to be cleared from the candidates of cells (skipping keep), True if anything would be removed
+        candidates = self.candidates
+        removed = False
+        for cell in cells:
+            hit = candidates[cell] & mask
+            if hit and cell not in keep:
+                removals[cell] = removals.get(cell, 0) | hit
+                removed = True
+        return removed
+
+    def eliminate(self, removals):
+        candidates = self.candidates
+        for cell, mask in removals.items():
+            candidates[cell] &= ~mask
+            if candidates[cell] == 0:
+                self.broken = True
+
+    def hidden_singles(self):
+        # a digit that fits only one cell of a unit
+        candidates = self.candidates
+        found = {}
+        for unit in self.units:
+            once = twice = 0
+            for cell in unit:
+                mask = candidates[cell]
+                twice |= once & mask
+                once |= mask
+            only = once & ~twice
+            if only:
+                for cell in unit:
+                    if candidates[cell] & only:
+                        found[cell] = found.get(cell, 0) | candidates[cell] & only
+        return self.fill(found)
+
+    def naked_singles(self):
+        # a cell with one candidate left
+        return self.fill({cell: mask for cell, mask in enumerate(self.candidates) if mask and mask & (mask - 1) == 0})
+
+    def pointing(self):
+        # a digit confined to one line within a box can't be anywhere else on that line
+        candidates = self.candidates
+        removals = {}
+        found = 0
+        for segment, line_rest, box_rest in self.intersections:
+            inside = 0
+            for cell in segment:
+                inside |= candidates[cell]
+            if not inside:
+                continue
+            elsewhere = 0
+            for cell in box_rest:
+                elsewhere |= candidates[cell]
+            if inside & ~elsewhere and self.remove(removals, line_rest, inside & ~elsewhere):
+                found += 1
+        self.eliminate(removals)
+        return found
+
+    def claiming(self):
+        # a digit confined to one box within a line can't be anywhere else in that box
+        candidates = self.candidates
+        removals = {}
+        found = 0
+        for segment, line_rest, box_rest in self.intersections:
+            inside = 0
+            for cell in segment:
+                inside |= candidates[cell]
+            if not inside:
+                continue
+            elsewhere = 0
+            for cell in line_rest:
+                elsewhere |= candidates[cell]
+            if inside & ~elsewhere and self.remove(removals, box_rest, inside & ~elsewhere):
+                found += 1
+        self.eliminate(removals)
+        return found
+
+    def naked_pairs(self):
+        # two cells of a unit with the same two candidates take those digits from the rest of the unit
+        candidates = self.candidates
+        removals = {}
+        found = 0
+        for unit in self.units:
+            seen = {}
+            for cell in unit:
+                mask = candidates[cell]
+                if mask.bit_count() == 2:
+                    seen.setdefault(mask, []).append(cell)
+            for mask, cells in seen.items():
+                if len(cells) == 2 and self.remove(removals, unit, mask, keep=cells):
+                    found += 1
+        self.eliminate(removals)
+        return found
+
+    def hidden_pairs(self):
+        # two digits that fit only the same two cells of a unit clear every other candidate from those cells
+        candidates = self.candidates
+        removals = {}
+        found = 0
+        for unit in self.units:
+            pairs = {}
+            for bit in self.digits:
+                cells = tuple(cell for cell in unit if candidates[cell] & bit)
+                if len(cells) == 2:
+                    pairs[cells] = pairs.get(cells, 0) | bit
+            for cells, keep in pairs.items():
+                if keep.bit_count() == 2 and self.remove(removals, cells, ~keep):
+                    found += 1
+        self.eliminate(removals)
+        return found
+
+    def x_wings(self):
+        # a digit that fits the same two positions in two lines can't be anywhere else across those positions
+        candidates = self.candidates
+        removals = {}
+        found = 0
+        for lines, crosses in ((self.rows, self.cols), (self.cols, self.rows)):
+            for bit in self.digits:
+                seen = {}
+                for index, line in enumerate(lines):
+                    positions = tuple(k for k, cell in enumerate(line) if candidates[cell] & bit)
+                    if len(positions) == 2:
+                        seen.setdefault(positions, []).append(index)
+                for (first, second), indices in seen.items():
+                    if len(indices) != 2:
+                        continue
+                    keep = (crosses[first][indices[0]], crosses[first][indices[1]],
+                            crosses[second][indices[0]], crosses[second][indices[1]])
+                    if self.remove(removals, crosses[first] + crosses[second], bit, keep=keep):
+                        found += 1
+        self.eliminate(removals)
+        return found
+
+    def guess(self):
+        # no technique applies: fill every cell tied for the fewest candidates from the solution, each counted as a guess
+        # so a board that needs more guessing costs more (an empty grid is 81 guesses, not one)
+        if self.solution is None:
+            n = len(self.board)
+            solution = sudoku_solver.solve([self.values[i * n:(i + 1) * n] for i in range(n)])
+            if solution is None:
+                self.broken = True
+                return 0
+            self.solution = [num for row in solution for num in row]
+        fewest = min(mask.bit_count() for mask in self.candidates if mask)
+        return self.fill({cell: 1 << (self.solution[cell] - 1) for cell, mask in enumerate(self.candidates)
+                          if mask and mask.bit_count() == fewest})
+
+    def solve(self):
+        # returns how often each technique was needed, stops early if the board is broken
+        used = {}
+        while not self.broken and any(self.candidates):
+            for name, step in self.steps:
+                count = step()
+                if count:
+                    used[name] = used.get(name, 0) + count
+                    break
+            else:
+                break
+        return used
+
+    def next_move(self):
+        # runs the techniques until a cell gets filled, returns (cell, value, hardest technique needed) or None
+        # the filling step is undone so the grader stays at the board's position, the eliminations before it are kept
+        # and a later call (after place() for whatever the player entered) carries on from them
+        hardest = None
+        while not self.broken and any(self.candidates):
+            for name, step in self.steps:
+                before = self.values[:], self.candidates[:], self.broken
+                if step():
+                    if hardest is None or TECHNIQUES[name] > TECHNIQUES[hardest]:
+                        hardest = name
+                    for cell, num in enumerate(self.values):
+                        if num != before[0][cell]:
+                            self.values, self.candidates, self.broken = before
+                            return cell, num, hardest
+                    break
+            else:
+                return None
+        return None
+
+def grade(board):
+    # returns (score, techniques), raises ValueError if the puzzle breaks a rule or has no solution
+    grader = LogicGrader(board)
+    used = grader.solve()
+    if grader.broken or 0 in grader.values:
+        raise ValueError("puzzle has no solution")
+    return sum(TECHNIQUES[name] * count for name, count in used.items()), {name: used[name] for name in TECHNIQUES if name in used}
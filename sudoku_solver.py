@@ -0,0 +1,183 @@
+import math
+
+# Exact cover solver for sudoku boards using Knuth's Dancing Links (Algorithm X).
+# Boards are the same list of lists that SudokuGenerator.get_board() returns, with 0 for empty cells.
+
+class DancingLinks:
+
+    def __init__(self, num_columns, rows):
+        # node 0 is the root, nodes 1..num_columns are the column headers
+        self.left = [num_columns] + list(range(num_columns))
+        self.right = list(range(1, num_columns + 1)) + [0]
+        self.up = list(range(num_columns + 1))
+        self.down = list(range(num_columns + 1))
+        self.column = list(range(num_columns + 1))
+        self.row_id = [-1] * (num_columns + 1)
+        self.size = [0] * (num_columns + 1)
+        for row_id, columns in rows:
+            self.add_row(row_id, columns)
+
+    def add_row(self, row_id, columns):
+        # columns are 1 based, every row becomes a circular list of nodes linked into its columns
+        first = len(self.column)
+        for offset, col in enumerate(columns):
+            node = first + offset
+            self.column.append(col)
+            self.row_id.append(row_id)
+            self.up.append(self.up[col])
+            self.down.append(col)
+            self.down[self.up[col]] = node
+            self.up[col] = node
+            self.size[col] += 1
+            self.left.append(node - 1 if offset else first + len(columns) - 1)
+            self.right.append(node + 1 if offset < len(columns) - 1 else first)
+
+    def cover(self, col):
+        left, right, up, down, column, size = self.left, self.right, self.up, self.down, self.column, self.size
+        right[left[col]] = right[col]
+        left[right[col]] = left[col]
+        i = down[col]
+        while i != col:
+            j = right[i]
+            while j != i:
+                down[up[j]] = down[j]
+                up[down[j]] = up[j]
+                size[column[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def uncover(self, col):
+        left, right, up, down, column, size = self.left, self.right, self.up, self.down, self.column, self.size
+        i = up[col]
+        while i != col:
+            j = left[i]
+            while j != i:
+                size[column[j]] += 1
+                down[up[j]] = j
+                up[down[j]] = j
+                j = left[j]
+            i = up[i]
+        right[left[col]] = col
+        left[right[col]] = col
+
+    def choose_column(self):
+        # the column with the fewest rows left gives the smallest branching factor
+        right, size = self.right, self.size
+        best = right[0]
+        col = right[best]
+        while col != 0 and size[best] > 1:
+            if size[col] < size[best]:
+                best = col
+            col = right[col]
+        return best
+
+    def search(self):
+        # iterative Algorithm X, yields the row ids of each exact cover as it is found
+        right, left, down, column = self.right, self.left, self.down, self.column
+        chosen = []  # the row node picked at each level
+        columns = []  # the column covered at each level
+        descending = True
+        while True:
+            if descending:
+                if right[0] == 0:
+                    yield [self.row_id[node] for node in chosen]
+                    descending = False
+                    continue
+                col = self.choose_column()
+                if self.size[col] == 0:
+                    descending = False
+                    continue
+                self.cover(col)
+                node = down[col]
+                columns.append(col)
+            else:
+                if not chosen:
+                    return
+                node = chosen.pop()
+                col = columns[-1]
+                j = left[node]
+                while j != node:
+                    self.uncover(column[j])
+                    j = left[j]
+                node = down[node]
+                if node == col:
+                    self.uncover(col)
+                    columns.pop()
+                    continue
+            chosen.append(node)
+            j = right[node]
+            while j != node:
+                self.cover(column[j])
+                j = right[j]
+            descending = True
+
+
+def board_size(board):
+    row_length = len(board)
+    box_length = int(math.sqrt(row_length))
+    # Ensure board size is a perfect square
+    if box_length ** 2 != row_length or any(len(row) != row_length for row in board):
+        raise ValueError("Board must be square with a perfect square row length (e.g., 9 for a 9x9 Sudoku board)")
+    return row_length, box_length
+
+def build_links(board):
+    # one row per (cell, digit) choice, four constraint columns each: cell filled, digit in row, digit in column, digit in box
+    n, box_length = board_size(board)
+    cells = n * n
+    row_used = [0] * n
+    col_used = [0] * n
+    box_used = [0] * n
+    for r in range(n):
+        for c in range(n):
+            num = board[r][c]
+            if num != 0:
+                bit = 1 << (num - 1)
+                box = (r // box_length) * box_length + c // box_length
+                row_used[r] |= bit
+                col_used[c] |= bit
+                box_used[box] |= bit
+    rows = []
+    for r in range(n):
+        for c in range(n):
+            box = (r // box_length) * box_length + c // box_length
+            num = board[r][c]
+            if num != 0:
+                digits = [num]
+            else:
+                # digits already given in a peer can never be chosen, so their rows are left out
+                used = row_used[r] | col_used[c] | box_used[box]
+                digits = [d for d in range(1, n + 1) if not used >> (d - 1) & 1]
+            for d in digits:
+                rows.append(((r * n + c) * n + d - 1, [
+                    1 + r * n + c,
+                    1 + cells + r * n + d - 1,
+                    1 + 2 * cells + c * n + d - 1,
+                    1 + 3 * cells + box * n + d - 1,
+                ]))
+    return DancingLinks(4 * cells, rows)
+
+def decode(row_ids, n):
+    solution = [[0] * n for _ in range(n)]
+    for row_id in row_ids:
+        cell, digit = divmod(row_id, n)
+        solution[cell // n][cell % n] = digit + 1
+    return solution
+
+def all_solutions(board):
+    # lazily yields every solution of board as a new list of lists, the input is never changed
+    n = len(board)
+    for row_ids in build_links(board).search():
+        yield decode(row_ids, n)
+
+def solve(board):
+    # returns the first solution found, or None if the board has none
+    return next(all_solutions(board), None)
+
+def count_solutions(board, limit=2):
+    # counts solutions but stops once limit is reached, so count_solutions(board) == 1 means the puzzle is unique
+    found = 0
+    for _ in build_links(board).search():
+        found += 1
+        if limit is not None and found >= limit:
+            break
+    return found
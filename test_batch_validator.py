@@ -0,0 +1,68 @@
+import random
+import pytest
+np = pytest.importorskip("numpy")
+from batch_validator import board_verdicts, validate_boards
+from sudoku_board import Board
+from sudoku_generator import SudokuGenerator
+
+def grid(seed, row_length=9):
+    generator = SudokuGenerator(0, row_length, rng=random.Random(seed))
+    generator.fill_values()
+    return generator.get_board()
+
+def mixed_boards(count, row_length=9, seed=0):
+    # full grids, some with a few cells overwritten (digits may repeat) and some with cells emptied
+    rng = random.Random(seed)
+    boards = []
+    for index in range(count):
+        board = grid(index % 5, row_length)
+        for _ in range(rng.choice((0, 0, 1, 3))):
+            board[rng.randrange(row_length)][rng.randrange(row_length)] = rng.randint(1, row_length)
+        for _ in range(rng.choice((0, 0, 0, 2))):
+            board[rng.randrange(row_length)][rng.randrange(row_length)] = 0
+        boards.append(board)
+    return boards
+
+def is_board_complete(board):
+    generator = SudokuGenerator(0, len(board))
+    generator.board = board
+    return generator.is_board_complete()
+
+@pytest.mark.parametrize("row_length", [9, 16])
+def test_matches_the_generator_and_the_board(row_length):
+    boards = mixed_boards(40, row_length)
+    solved, conflicts = validate_boards(np.array(boards))
+    assert solved.tolist() == [is_board_complete(board) for board in boards]
+    assert 0 < solved.sum() < len(boards)
+    for board, marked in zip(boards, conflicts):
+        # the cells Board flags as conflicts when the same board is loaded
+        expected = Board(540, 540, None, "easy", puzzle=board).conflicts
+        assert {(r, c) for r, c in zip(*np.nonzero(marked))} == expected
+
+def test_chunks_give_the_same_result():
+    boards = np.array(mixed_boards(30, seed=1))
+    solved, conflicts = validate_boards(boards)
+    chunked_solved, chunked_conflicts = validate_boards(boards, chunk_size=7)
+    assert (solved == chunked_solved).all() and (conflicts == chunked_conflicts).all()
+
+def test_out_of_range_digits():
+    board = np.array([grid(1)])
+    board[0, 4, 4] = 10
+    board[0, 0, 0] = -1
+    solved, conflicts = validate_boards(board)
+    assert not solved[0]
+    assert conflicts[0, 4, 4] and conflicts[0, 0, 0]
+
+def test_verdicts():
+    full = grid(2)
+    broken = [row[:] for row in full]
+    broken[0][0], broken[0][1] = broken[0][1], broken[0][0]
+    partial = [row[:] for row in full]
+    partial[3][3] = 0
+    assert board_verdicts([full, broken, partial]) == ["solved", "invalid", "incomplete"]
+
+def test_bad_shape():
+    with pytest.raises(ValueError):
+        validate_boards(np.zeros((2, 9, 8), dtype=int))
+    with pytest.raises(ValueError):
+        validate_boards(np.zeros((2, 8, 8), dtype=int))
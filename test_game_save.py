@@ -0,0 +1,92 @@
+import pytest
+from game_save import HEADER, MOVE, load_game, save_game
+from sudoku_board import Board
+
+def played_board():
+    # a few edits on the first empty cells, then one undo, so the log has something to redo
+    board = Board(540, 540, None, "easy")
+    empties = [(i, j) for i in range(9) for j in range(9) if board.cells[i][j].value == 0]
+    for (row, col), value in zip(empties[:3], (4, 7, 2)):
+        board.select(row, col)
+        board.sketch(value)
+        board.submit_guess()
+    board.select(*empties[3])
+    board.sketch(9)
+    board.undo()
+    return board, empties
+
+@pytest.fixture
+def saved(tmp_path):
+    board, empties = played_board()
+    path = str(tmp_path / "game.save")
+    save_game(board, path)
+    with open(path, "rb") as f:
+        return board, empties, path, bytearray(f.read())
+
+def load_bytes(tmp_path, data):
+    path = str(tmp_path / "changed.save")
+    with open(path, "wb") as f:
+        f.write(data)
+    return load_game(540, 540, None, path)
+
+def test_round_trip(saved):
+    board, empties, path, _ = saved
+    loaded = load_game(540, 540, None, path)
+    assert loaded.model.snapshot() == board.model.snapshot()
+    assert bytes(loaded.model.sketches) == bytes(board.model.sketches)
+    assert loaded.moves == board.moves and loaded.position == board.position
+    assert loaded.redo() and loaded.cells[empties[3][0]][empties[3][1]].sketched_value == 9
+    while loaded.undo():
+        pass
+    assert loaded.model.snapshot() == loaded.initial_values
+
+def test_missing_file(tmp_path):
+    assert load_game(540, 540, None, str(tmp_path / "none.save")) is None
+
+def given_index(data):
+    return next(i for i in range(81) if data[HEADER.size + i])
+
+def empty_index(data):
+    return next(i for i in range(81) if not data[HEADER.size + i])
+
+def set_byte(offset, value):
+    def change(data):
+        data[offset] = value
+    return change
+
+@pytest.mark.parametrize("name", ["magic", "difficulty", "row length", "position", "value", "sketch", "given changed",
+                                  "truncated", "move cell", "move digit", "move on given", "move out of order"])
+def test_damaged_save_is_rejected(saved, tmp_path, name):
+    _, _, _, data = saved
+    moves = HEADER.size + 3 * 81
+    changes = {
+        "magic": lambda data: data.__setitem__(slice(0, 4), b"XXXX"),
+        "difficulty": lambda data: data.__setitem__(slice(8, 12), b"zzzz"),
+        "row length": set_byte(6, 4),
+        "position": lambda data: data.__setitem__(slice(HEADER.size - 4, HEADER.size), (99).to_bytes(4, "little")),
+        "value": set_byte(HEADER.size + 81 + empty_index(data), 200),
+        "sketch": set_byte(HEADER.size + 162 + empty_index(data), 10),
+        "given changed": set_byte(HEADER.size + 81 + given_index(data), data[HEADER.size + given_index(data)] % 9 + 1),
+        "truncated": lambda data: data.__delitem__(slice(-1, None)),
+        "move cell": lambda data: data.__setitem__(slice(moves, moves + 2), (81).to_bytes(2, "little")),
+        "move digit": set_byte(moves + 3, 10),
+        "move on given": lambda data: data.__setitem__(slice(moves, moves + 2), given_index(data).to_bytes(2, "little")),
+        # the first move's new value no longer matches what the later state implies
+        "move out of order": set_byte(moves + 3, data[moves + 3] % 9 + 1),
+    }
+    changes[name](data)
+    assert load_bytes(tmp_path, data) is None
+
+def test_untouched_copy_loads(saved, tmp_path):
+    _, _, _, data = saved
+    assert load_bytes(tmp_path, data) is not None
+
+def test_reset_history_loads(tmp_path):
+    # a reset keeps the sketches but clears the log, which must still be accepted
+    board, _ = played_board()
+    board.reset_to_original()
+    board.select(*next((i, j) for i in range(9) for j in range(9) if board.cells[i][j].value == 0))
+    board.sketch(5)
+    path = str(tmp_path / "reset.save")
+    save_game(board, path)
+    assert load_game(540, 540, None, path) is not None
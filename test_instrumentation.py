@@ -0,0 +1,33 @@
+import random
+import instrumentation
+from sudoku_generator import SudokuGenerator
+
+def generate(unique):
+    generator = SudokuGenerator(45, rng=random.Random(1))
+    generator.fill_values()
+    generator.remove_cells(unique=unique)
+
+def test_generator_counters():
+    instrumentation.reset()
+    instrumentation.enable()
+    try:
+        generate(unique=True)
+        generate(unique=False)
+        stats = instrumentation.stats()
+    finally:
+        instrumentation.disable()
+        instrumentation.reset()
+    # the hot path is counted, not is_valid, which generation no longer calls
+    assert stats["generator.candidate_mask"]["count"] > 0
+    assert stats["generator.place"]["count"] > 0
+    assert stats["generator.remove_cells"]["calls"] == 2
+    # uniqueness rejections and empty random picks are told apart
+    assert stats["generator.remove_if_unique.rejected"]["count"] > 0
+    assert stats["generator.remove_cells.empty_picks"]["count"] > 0
+
+def test_disabled_leaves_plain_methods():
+    original = SudokuGenerator.candidate_mask
+    instrumentation.enable()
+    assert SudokuGenerator.candidate_mask is not original
+    instrumentation.disable()
+    assert SudokuGenerator.candidate_mask is original
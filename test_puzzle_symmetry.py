@@ -0,0 +1,80 @@
+import random, time
+import pytest
+import puzzle_symmetry
+from sudoku_generator import SudokuGenerator
+
+def generated(removed=50, seed=1):
+    generator = SudokuGenerator(removed, rng=random.Random(seed))
+    generator.fill_values()
+    solution = [row[:] for row in generator.get_board()]
+    generator.remove_cells(unique=True)
+    return generator.get_board(), solution
+
+def timed_form(board):
+    start = time.perf_counter()
+    form = puzzle_symmetry.canonical_form(board)
+    return form, time.perf_counter() - start
+
+def test_empty_board_is_fast():
+    # every ordering of the empty rows and columns ties, which used to be expanded one by one (about a minute)
+    form, seconds = timed_form([[0] * 9 for _ in range(9)])
+    assert form == bytes(81)
+    assert seconds < 2
+
+@pytest.mark.parametrize("row, col, num", [(0, 0, 1), (4, 4, 5), (8, 2, 9)])
+def test_one_clue_is_fast(row, col, num):
+    board = [[0] * 9 for _ in range(9)]
+    board[row][col] = num
+    form, seconds = timed_form(board)
+    # the clue moves to the last cell and is renamed 1, wherever it was
+    assert form == bytes(80) + b"\x01"
+    assert seconds < 2
+
+def test_variants_share_the_form():
+    puzzle, solution = generated()
+    form = puzzle_symmetry.canonical_form(puzzle)
+    pairs = list(puzzle_symmetry.variants(puzzle, solution, 10, random.Random(2)))
+    assert len(pairs) == 10
+    for variant, variant_solution in pairs:
+        assert variant != puzzle
+        assert puzzle_symmetry.canonical_form(variant) == form
+        # the same transform was applied to the solution
+        assert all(variant[i][j] in (0, variant_solution[i][j]) for i in range(9) for j in range(9))
+
+def test_sparse_variants_share_the_form():
+    _, solution = generated()
+    rng = random.Random(3)
+    cells = rng.sample(range(81), 4)
+    board = [[solution[i][j] if i * 9 + j in cells else 0 for j in range(9)] for i in range(9)]
+    form = puzzle_symmetry.canonical_form(board)
+    for variant, _ in puzzle_symmetry.variants(board, None, 5, rng):
+        assert puzzle_symmetry.canonical_form(variant) == form
+
+def test_variants_without_solution():
+    puzzle, _ = generated()
+    assert all(solution is None for _, solution in puzzle_symmetry.variants(puzzle, None, 3, random.Random(4)))
+
+def test_different_puzzles_differ():
+    first, _ = generated(seed=1)
+    second, _ = generated(seed=2)
+    assert puzzle_symmetry.canonical_form(first) != puzzle_symmetry.canonical_form(second)
+
+def test_repeated_digit_has_no_form():
+    board = [[0] * 9 for _ in range(9)]
+    board[0][0] = board[0][5] = 3
+    with pytest.raises(ValueError):
+        puzzle_symmetry.canonical_form(board)
+
+def test_index_rejects_isomorphic_copies(tmp_path):
+    puzzle, solution = generated()
+    variant, _ = next(puzzle_symmetry.variants(puzzle, solution, 1, random.Random(5)))
+    path = str(tmp_path / "index")
+    with puzzle_symmetry.CanonicalIndex(path) as index:
+        assert index.add(puzzle)
+        assert not index.add(variant)
+        assert len(index) == 1
+    with open(path, "ab") as f:
+        f.write(b"\x01\x02\x03")  # a record cut short by a crash
+    with puzzle_symmetry.CanonicalIndex(path) as index:
+        assert variant in index
+        assert len(index) == 1
@@ -0,0 +1,144 @@
+import random
+import sudoku_solver
+from sudoku_board import Board
+from sudoku_generator import SudokuGenerator
+
+SINGLES = ("hidden single", "naked single")
+
+def hard_board(seed=5):
+    # seed 5 needs pointing, claiming, a naked pair and guesses on top of singles
+    generator = SudokuGenerator(58, rng=random.Random(seed))
+    generator.fill_values()
+    generator.remove_cells(unique=True)
+    puzzle = generator.get_board()
+    return Board(540, 540, None, "hard", puzzle=puzzle), sudoku_solver.solve(puzzle)
+
+def enter(board, row, col, value):
+    board.select(row, col)
+    board.sketch(value)
+    board.submit_guess()
+
+def play_to_hard_hint(board):
+    # follows hints while singles are enough, returns the first move that needs more
+    while True:
+        move = board.hint()
+        if move is None or move[3] not in SINGLES:
+            return move
+        enter(board, *move[:3])
+
+def test_following_hints_solves_the_puzzle():
+    board, solution = hard_board()
+    techniques = set()
+    while (move := board.hint()) is not None:
+        row, col, value, technique = move
+        assert solution[row][col] == value
+        techniques.add(technique)
+        enter(board, row, col, value)
+    assert board.check_is_full() and board.check_is_correct()
+    assert techniques - set(SINGLES)
+
+def test_hard_hint_is_kept_until_the_board_changes():
+    board, solution = hard_board()
+    move = play_to_hard_hint(board)
+    grader = board.grader
+    assert grader is not None
+    assert board.hint() == move and board.grader is grader
+    # a correct value is taken in place
+    enter(board, *move[:3])
+    assert board.grader is grader
+    assert board.hint() is not None and board.grader is grader
+
+def test_undo_and_wrong_values_drop_the_grader():
+    board, solution = hard_board()
+    move = play_to_hard_hint(board)
+    row, col, value, _ = move
+    enter(board, row, col, value)
+    board.undo()
+    assert board.grader is None
+    assert board.hint() == move
+    wrong = next(num for num in range(1, 10) if num != value and board.candidates[row * 9 + col] & 1 << (num - 1))
+    enter(board, row, col, wrong)
+    assert board.grader is None
+    board.undo()
+    assert board.hint() == move
+
+def sketched_after(board, keys):
+    for key in keys:
+        board.type_digit(key)
+    row, col = board.selected_cell
+    return board.cells[row][col].sketched_value
+
+def empty_cell(board):
+    n = board.row_length
+    return next((i, j) for i in range(n) for j in range(n) if board.cells[i][j].value == 0)
+
+def test_number_keys_on_9x9():
+    board, _ = hard_board()
+    board.select(*empty_cell(board))
+    assert sketched_after(board, [1]) == 1
+    assert sketched_after(board, [2]) == 2
+    assert sketched_after(board, [0]) == 2  # 0 is not a value on its own
+
+def test_two_digit_values_on_16x16():
+    board = Board(540, 540, None, "easy", row_length=16)
+    board.select(*empty_cell(board))
+    assert sketched_after(board, [1]) == 1
+    assert sketched_after(board, [6]) == 16
+    assert sketched_after(board, [1, 0]) == 10
+    assert sketched_after(board, [1, 7]) == 7  # 17 is too big, the 7 starts over
+    assert sketched_after(board, [2]) == 2  # nothing above 16 starts with 2
+    assert sketched_after(board, [1]) == 1
+    # selecting a cell or submitting ends the value being typed
+    board.submit_guess()
+    row, col = board.selected_cell
+    assert board.cells[row][col].value == 1
+    board.select(*empty_cell(board))
+    assert sketched_after(board, [5]) == 5
+    board.select(*board.selected_cell)
+    assert sketched_after(board, [1, 2]) == 12
+
+def state(board):
+    return bytes(board.model.values), bytes(board.model.sketches)
+
+def test_undo_and_redo_walk_the_history():
+    board, _ = hard_board(seed=3)
+    rng = random.Random(3)
+    empties = [(i, j) for i in range(9) for j in range(9) if board.cells[i][j].value == 0]
+    history = [state(board)]
+    for _ in range(60):
+        board.select(*rng.choice(empties))
+        board.sketch(rng.randint(1, 9))
+        if state(board) != history[-1]:
+            history.append(state(board))
+        if rng.random() < 0.6:
+            board.submit_guess()
+            if state(board) != history[-1]:
+                history.append(state(board))
+    # every edit is one move, so undo steps back through exactly the states seen
+    assert board.position == len(board.moves) == len(history) - 1
+    states = [state(board)]
+    while board.undo():
+        states.append(state(board))
+    assert states == history[::-1]
+    while board.redo():
+        pass
+    assert state(board) == history[-1]
+    # the incremental counts, conflicts and candidates end up as if the board had been loaded from scratch
+    fresh = Board(540, 540, None, "hard", puzzle=board.model.to_lists())
+    assert board.conflicts == fresh.conflicts
+    assert board.candidates == fresh.candidates
+    assert board.naked_singles == fresh.naked_singles and board.hidden_singles == fresh.hidden_singles
+
+def test_edit_after_undo_drops_the_redo_branch():
+    board, _ = hard_board(seed=3)
+    row, col = empty_cell(board)
+    for value in (4, 5):
+        enter(board, row, col, value)
+    board.undo()
+    assert board.cells[row][col].value == 4
+    enter(board, row, col, 6)
+    assert not board.redo()
+    board.undo()
+    assert board.cells[row][col].value == 4
+    board.reset_to_original()
+    assert board.cells[row][col].value == 0 and not board.undo()
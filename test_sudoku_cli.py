@@ -0,0 +1,39 @@
+import io
+import pytest
+import sudoku_cli, sudoku_grader
+
+def run(argv, text=""):
+    out = io.StringIO()
+    status = sudoku_cli.main(argv, io.StringIO(text), out)
+    return status, out.getvalue().splitlines()
+
+@pytest.mark.parametrize("score", ["abc", "100", "200-100", "-5-10", "1-x"])
+def test_bad_score_is_a_usage_error(score, capsys):
+    with pytest.raises(SystemExit) as exit:
+        sudoku_cli.main(["generate", f"--score={score}"])
+    assert exit.value.code == 2
+    assert "LOW-HIGH" in capsys.readouterr().err
+
+def test_score_band():
+    assert sudoku_cli.score_band("46-150") == (46, 150)
+
+def test_generate_graded_stays_in_band():
+    status, lines = run(["generate", "--count", "6", "--difficulty", "hard", "--graded", "--variants", "3", "--seed", "1"])
+    assert status == 0 and len(lines) == 6
+    assert all(sudoku_grader.grade(sudoku_cli.parse_board(line))[0] >= 151 for line in lines)
+
+def test_generate_unreachable_band_fails(capsys):
+    status, lines = run(["generate", "--count", "1", "--removed", "20", "--score", "0-5", "--seed", "1"])
+    assert status == 1 and lines == []
+    assert "0-5" in capsys.readouterr().err
+
+def test_read_boards_skips_comments_and_blanks():
+    board = "." * 81
+    text = f"# header\n\n   # indented comment\n{board}\nnot a board\n"
+    boards = list(sudoku_cli.read_boards(io.StringIO(text)))
+    assert [number for number, _ in boards] == [4, 5]
+    assert boards[0][1] == [[0] * 9 for _ in range(9)] and boards[1][1] is None
+
+def test_canon_reports_repeated_digits():
+    status, lines = run(["canon"], "." * 81 + "\n" + "11" + "." * 79 + "\n")
+    assert status == 1 and lines == ["." * 81, "error"]
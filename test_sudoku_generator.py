@@ -0,0 +1,160 @@
+import random
+import pytest
+import sudoku_generator, sudoku_solver
+from sudoku_board import removed_for
+from sudoku_generator import SudokuGenerator
+
+class ScanGenerator:
+    # the generator before the bitmasks: every check scans the row, column and box
+    def __init__(self, removed_cells, rng):
+        self.removed_cells = removed_cells
+        self.rng = rng
+        self.board = [[0] * 9 for _ in range(9)]
+
+    def is_valid(self, row, col, num):
+        current = self.board[row][col]
+        self.board[row][col] = 0
+        top, left = row - row % 3, col - col % 3
+        valid = (num not in self.board[row] and all(self.board[r][col] != num for r in range(9))
+                 and all(self.board[r][c] != num for r in range(top, top + 3) for c in range(left, left + 3)))
+        self.board[row][col] = current
+        return valid
+
+    def fill_values(self):
+        for start in range(0, 9, 3):
+            nums = list(range(1, 10))
+            self.rng.shuffle(nums)
+            for i in range(start, start + 3):
+                for j in range(start, start + 3):
+                    self.board[i][j] = nums.pop()
+        self.fill_remaining(0, 0)
+
+    def fill_remaining(self, row, col):
+        if col >= 9 and row < 8:
+            row += 1
+            col = 0
+        if row >= 9 and col >= 9:
+            return True
+        if row < 3:
+            if col < 3:
+                col = 3
+        elif row < 6:
+            if col == row // 3 * 3:
+                col += 3
+        elif col == 6:
+            row += 1
+            col = 0
+            if row >= 9:
+                return True
+        for num in range(1, 10):
+            if self.is_valid(row, col, num):
+                self.board[row][col] = num
+                if self.fill_remaining(row, col + 1):
+                    return True
+                self.board[row][col] = 0
+        return False
+
+    def remove_cells(self):
+        removed = 0
+        while removed < self.removed_cells:
+            i = self.rng.randint(0, 8)
+            j = self.rng.randint(0, 8)
+            if self.board[i][j] != 0:
+                self.board[i][j] = 0
+                removed += 1
+
+    def is_board_complete(self):
+        return all(self.board[r][c] != 0 and self.is_valid(r, c, self.board[r][c]) for r in range(9) for c in range(9))
+
+@pytest.mark.parametrize("seed", range(5))
+def test_same_seed_same_puzzle(seed):
+    old = ScanGenerator(45, random.Random(seed))
+    new = SudokuGenerator(45, rng=random.Random(seed))
+    old.fill_values()
+    new.fill_values()
+    assert new.get_board() == old.board
+    old.remove_cells()
+    new.remove_cells()
+    assert new.get_board() == old.board
+
+def scrambled(seed):
+    # a full grid with a few cells overwritten, so digits repeat in some units, then some cells emptied
+    generator = SudokuGenerator(0, rng=random.Random(seed))
+    generator.fill_values()
+    board = generator.get_board()
+    rng = random.Random(seed)
+    for _ in range(6):
+        board[rng.randrange(9)][rng.randrange(9)] = rng.randint(1, 9)
+    for _ in range(20):
+        board[rng.randrange(9)][rng.randrange(9)] = 0
+    return board
+
+@pytest.mark.parametrize("seed", range(5))
+def test_checks_match_with_repeated_digits(seed):
+    board = scrambled(seed)
+    old = ScanGenerator(0, None)
+    old.board = [row[:] for row in board]
+    new = SudokuGenerator(0)
+    new.board = board
+    for row in range(9):
+        for col in range(9):
+            for num in range(1, 10):
+                assert new.is_valid(row, col, num) == old.is_valid(row, col, num), (row, col, num)
+    assert new.is_board_complete() == old.is_board_complete()
+
+def test_set_value_and_clear_keep_the_masks():
+    board = scrambled(7)
+    old = ScanGenerator(0, None)
+    old.board = [row[:] for row in board]
+    new = SudokuGenerator(0)
+    new.board = board
+    rng = random.Random(7)
+    for _ in range(300):
+        row, col, num = rng.randrange(9), rng.randrange(9), rng.randint(1, 9)
+        if rng.random() < 0.3:
+            new.clear(row, col)
+            old.board[row][col] = 0
+        else:
+            accepted = old.board[row][col] == 0 and old.is_valid(row, col, num)
+            if accepted:
+                old.board[row][col] = num
+            assert new.set_value(row, col, num) == accepted
+        assert new.get_board() == old.board
+    assert all(new.is_valid(r, c, n) == old.is_valid(r, c, n) for r in range(9) for c in range(9) for n in range(1, 10))
+
+def test_complete_board():
+    generator = SudokuGenerator(0, rng=random.Random(1))
+    generator.fill_values()
+    assert generator.is_board_complete()
+    board = generator.get_board()
+    board[0][0], board[0][1] = board[0][1], board[0][0]  # still full, each row still has every digit
+    generator.board = board
+    assert not generator.is_board_complete()
+
+@pytest.mark.parametrize("row_length", [4, 16, 25])
+def test_larger_grids_are_complete(row_length):
+    generator = SudokuGenerator(0, row_length, rng=random.Random(row_length))
+    generator.fill_values()
+    assert generator.is_board_complete()
+
+@pytest.mark.parametrize("row_length", [4, 9, 16])
+def test_unique_removal(row_length):
+    removed = removed_for("hard", row_length)
+    generator = SudokuGenerator(removed, row_length, rng=random.Random(1))
+    generator.fill_values()
+    solution = generator.get_board()
+    cells_removed = generator.remove_cells(unique=True)
+    puzzle = generator.get_board()
+    assert cells_removed == sum(row.count(0) for row in puzzle) <= removed
+    # beyond 9x9 a capped check keeps its cell, so there can be fewer holes but never a second solution
+    assert sudoku_solver.count_solutions(puzzle) == 1
+    assert sudoku_solver.solve(puzzle) == solution
+
+def test_capped_check_keeps_the_cell(monkeypatch):
+    # with no search allowed, only cells whose digit is forced by their peers can go
+    monkeypatch.setattr(sudoku_generator, "UNIQUE_NODES", 0)
+    generator = SudokuGenerator(removed_for("hard", 16), 16, rng=random.Random(2))
+    generator.fill_values()
+    cells_removed = generator.remove_cells(unique=True)
+    assert 0 < cells_removed < removed_for("hard", 16)
+    assert sudoku_solver.count_solutions(generator.get_board()) == 1
@@ -0,0 +1,67 @@
+import random
+import pytest
+import puzzle_symmetry, sudoku_solver
+from colors_and_values import difficulty_scores
+from sudoku_generator import SudokuGenerator
+from sudoku_grader import TECHNIQUES, LogicGrader, grade
+
+def generated(removed, seed):
+    generator = SudokuGenerator(removed, rng=random.Random(seed))
+    generator.fill_values()
+    generator.remove_cells(unique=True)
+    return generator.get_board()
+
+def test_easy_puzzle_needs_only_singles():
+    score, techniques = grade(generated(30, 1))
+    assert set(techniques) <= {"hidden single", "naked single"}
+    assert score == sum(TECHNIQUES[name] * count for name, count in techniques.items())
+
+def test_empty_grid_is_not_medium():
+    # every cell is a guess, far above any band but hard
+    score, techniques = grade([[0] * 9 for _ in range(9)])
+    assert techniques == {"guess": 81}
+    assert score >= difficulty_scores["hard"][0]
+
+def test_sparse_board_grades_hard():
+    board = [[0] * 9 for _ in range(9)]
+    board[4][4] = 5
+    assert grade(board)[0] >= difficulty_scores["hard"][0]
+
+@pytest.mark.parametrize("removed, seed", [(50, 1), (55, 2), (58, 3), (60, 4)])
+def test_variants_grade_the_same(removed, seed):
+    puzzle = generated(removed, seed)
+    expected = grade(puzzle)
+    for variant, _ in puzzle_symmetry.variants(puzzle, None, 8, random.Random(seed)):
+        assert grade(variant) == expected
+
+def test_conflicting_givens_raise():
+    board = [[0] * 9 for _ in range(9)]
+    board[0][0] = board[0][5] = 3
+    with pytest.raises(ValueError):
+        grade(board)
+
+def test_next_move_follows_the_solution():
+    board = generated(55, 5)
+    solution = sudoku_solver.solve(board)
+    while True:
+        move = LogicGrader(board).next_move()
+        if move is None:
+            break
+        cell, num, technique = move
+        assert technique in TECHNIQUES
+        assert board[cell // 9][cell % 9] == 0 and solution[cell // 9][cell % 9] == num
+        board[cell // 9][cell % 9] = num
+    assert board == solution
+
+def test_generate_graded_lands_in_band():
+    for name in ("easy", "medium", "hard"):
+        low, high = difficulty_scores[name]
+        generator = SudokuGenerator(50 if name == "hard" else 40, rng=random.Random(name))
+        score = generator.generate_graded(low, high)
+        assert score is not None and low <= score <= high
+        assert grade(generator.get_board())[0] == score
+        assert sudoku_solver.count_solutions(generator.get_board(), 2) == 1
+
+def test_generate_graded_reports_a_miss():
+    generator = SudokuGenerator(40, rng=random.Random(1))
+    assert generator.generate_graded(100000, 200000, attempts=2) is None
@@ -0,0 +1,73 @@
+import random
+import pytest
+import sudoku_solver
+from sudoku_generator import SudokuGenerator
+
+def generated(removed, seed, unique=True, row_length=9):
+    generator = SudokuGenerator(removed, row_length, rng=random.Random(seed))
+    generator.fill_values()
+    solution = generator.get_board()
+    generator.remove_cells(unique=unique)
+    return generator.get_board(), solution
+
+def is_solution(board, puzzle):
+    n = len(board)
+    box = int(n ** 0.5)
+    digits = set(range(1, n + 1))
+    return (all(set(row) == digits for row in board) and all(set(col) == digits for col in zip(*board))
+            and all({board[top + i][left + j] for i in range(box) for j in range(box)} == digits
+                    for top in range(0, n, box) for left in range(0, n, box))
+            and all(puzzle[r][c] in (0, board[r][c]) for r in range(n) for c in range(n)))
+
+@pytest.mark.parametrize("seed", range(5))
+def test_solves_unique_puzzles(seed):
+    puzzle, solution = generated(55, seed)
+    copy = [row[:] for row in puzzle]
+    assert sudoku_solver.solve(puzzle) == solution
+    assert sudoku_solver.count_solutions(puzzle) == 1
+    assert puzzle == copy  # the input is left alone
+
+def test_empty_board():
+    board = [[0] * 9 for _ in range(9)]
+    assert is_solution(sudoku_solver.solve(board), board)
+    assert sudoku_solver.count_solutions(board, limit=5) == 5
+
+def test_every_solution_is_listed():
+    # four cells of a full grid in two boxes, whose digits can swap along both rows, give a puzzle with two solutions
+    _, solution = generated(0, 1)
+    for r1 in range(9):
+        for r2 in range(r1 + 1, 9):
+            for c1 in range(9):
+                for c2 in range(c1 + 1, 9):
+                    a, b = solution[r1][c1], solution[r1][c2]
+                    if a != b and solution[r2][c1] == b and solution[r2][c2] == a and (r1 // 3 == r2 // 3 or c1 // 3 == c2 // 3):
+                        puzzle = [row[:] for row in solution]
+                        for r, c in ((r1, c1), (r1, c2), (r2, c1), (r2, c2)):
+                            puzzle[r][c] = 0
+                        found = list(sudoku_solver.all_solutions(puzzle))
+                        assert len(found) == 2 and solution in found
+                        assert all(is_solution(board, puzzle) for board in found)
+                        assert sudoku_solver.count_solutions(puzzle, limit=None) == 2
+                        return
+    pytest.skip("no swappable rectangle in this grid")
+
+def test_no_solution():
+    puzzle, _ = generated(50, 2)
+    empty = next((r, c) for r in range(9) for c in range(9) if puzzle[r][c] == 0)
+    # a digit that isn't used in the cell's row yet, given twice in its column
+    row, col = empty
+    puzzle[row][col] = next(num for num in range(1, 10) if num not in puzzle[row] and num in [puzzle[r][col] for r in range(9)])
+    assert sudoku_solver.solve(puzzle) is None
+    assert sudoku_solver.count_solutions(puzzle) == 0
+
+def test_larger_boards():
+    board = [[0] * 16 for _ in range(16)]
+    assert is_solution(sudoku_solver.solve(board), board)
+    board = [[0] * 4 for _ in range(4)]
+    assert sudoku_solver.count_solutions(board, limit=None) == 288
+
+def test_bad_shape():
+    with pytest.raises(ValueError):
+        sudoku_solver.solve([[0] * 8 for _ in range(8)])
+    with pytest.raises(ValueError):
+        sudoku_solver.solve([[0] * 9 for _ in range(8)])